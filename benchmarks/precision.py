@@ -0,0 +1,53 @@
+"""
+Compare the "mixed" precision mode against the float64 baseline
+
+Runs the simulation defined by config.toml in the current directory once in
+each precision mode and reports the run times and the deviation of the
+forces and moments from the float64 results. The wake roll-up amplifies
+small differences over the time march, so the deviation of a float64 run
+with the front wing position b_f perturbed at the float32 round-off level
+(1e-7) is reported as the scale to compare against.
+
+Usage: python benchmarks/precision.py   (from a directory with config.toml)
+"""
+import time
+import numpy as np
+import tombo.globals as g
+from tombo.simulate import simulate
+
+
+def run(precision):
+    g.precision = precision
+    # Warm up the compiled kernels so only the time march is measured
+    simulate()
+    start = time.perf_counter()
+    times, force, moment = simulate()
+    return time.perf_counter() - start, times, force, moment
+
+
+def deviation(a, ref):
+    return np.max(np.abs(a - ref)) / np.max(np.abs(ref))
+
+
+def main():
+    g.save_data = False
+    g.stream_data = False
+
+    t64, times, force64, moment64 = run('double')
+    t32, _, force32, moment32 = run('mixed')
+    g.precision = 'double'
+    g.b_f *= 1 + 1e-7
+    _, forcep, momentp = simulate()
+
+    print(f"double: {t64:.3f} s")
+    print(f"mixed:  {t32:.3f} s  (speedup {t64 / t32:.2f})")
+    print(f"{'max relative deviation from double':<36}{'mixed':>10}{'perturbed':>12}")
+    for name, a, p, ref in (('force', force32, forcep, force64),
+                            ('moment', moment32, momentp, moment64)):
+        for j, x in enumerate('xyz'):
+            print(f"{name + '_' + x:<36}{deviation(a[j], ref[j]):>10.2e}"
+                  f"{deviation(p[j], ref[j]):>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Benchmark suite: time the kernels and full runs, and check for regressions
+
+Times the kernels of the time march (vel_batch_groups, n_vel_T_by_segments,
+wings_nodes_L2GT, b_vel_B_by_T_matrix, s_impulse_WT, solution), the setup
+kernels (node_table, cross_matrix) and the original kernels (mVORTEX,
+element_vel, vel_by) on the meshes of the front wing of config.toml refined
+by --ratio, with a wake of WAKE_ROWS rows of the wing elements, and full
+simulate() runs across mesh sizes and step counts. Each kernel is compiled before it is timed, and the best of
+--repeat timings is kept. The scaling exponent p of time ~ size**p is fitted
+on a log-log scale for each series (size is the number of total elements of
+a wing, or the number of steps).
+
+With --save, the results are written to the baseline file. Otherwise, if the
+baseline file exists, each time is compared with the baseline time of the
+same series and size, the ones slower by more than --threshold are reported
+and the exit status is 1. Baselines are only comparable on the same machine.
+
+Usage: python benchmarks/suite.py [--save] [--baseline PATH] [--threshold 0.25]
+       (from a directory with config.toml)
+"""
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+from pathlib import Path
+
+import numpy as np
+import tombo.globals as g
+from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh
+from tombo.wing_total import wing_total
+from tombo.element_segments import element_segments, element_vel
+from tombo.node_table import node_table, wake_table, to_nodes, to_corners
+from tombo.source_segments import segment_table, wake_segment_table, source_segments, concat_segments
+from tombo.vel_batch import vel_batch_groups
+from tombo.n_vel_T_by_W import n_vel_T_by_segments
+from tombo.lr_mass_L2GT import wings_nodes_L2GT
+from tombo.mVORTEX import mVORTEX
+from tombo.vel_by import vel_by
+from tombo.cross_matrix import cross_matrix
+from tombo.b_vel_B_by_T_matrix import b_vel_B_by_T_matrix
+from tombo.s_impulse_WT import s_impulse_WT
+from tombo.solution import solution
+from tombo.simulate import simulate
+
+BASELINE = Path(__file__).parent / 'baseline.json'
+# Rows of wing elements in the wake of the kernel cases, so that the wake
+# grows with the mesh as it does in a run
+WAKE_ROWS = 8
+
+
+def best(f, repeat):
+    """Best time of one call of f, over repeat rounds of enough calls to take 0.2 s"""
+    f()
+    number, _ = timeit.Timer(f).autorange()
+    return min(timeit.Timer(f).repeat(repeat, number)) / number
+
+
+def wings(hfactor):
+    """
+    Total elements, border elements and collocation points of a wing pair
+    (the right wing of the front wing mesh and its mirror image)
+    """
+    xb, nxb, nb, xc, nxc, nc, *_ = symmetric_5_sided_mesh(
+        'f', g.lt_f, g.lr_f, g.bang_f, hfactor, g.wfactor_f)
+    _, xb, xt, nxt, xC, nC = wing_total(xb, nxb, nb, xc, nxc, nc)
+
+    def pair(x):
+        left = x.copy()
+        left[1] *= -1.0
+        return np.ascontiguousarray(np.stack([x, left], axis=-1))
+
+    return pair(xt[:, :, :nxt]), nxt, pair(xb[:, :, :nxb]), nxb, pair(xC), pair(nC)
+
+
+def kernel_cases(Xt, nxt, Xb, nxb, XC, NC):
+    """
+    Kernel calls on a wing pair, with a second (rear) pair behind it and
+    a wake of WAKE_ROWS rows of the wing elements behind that
+    """
+    rng = np.random.default_rng(0)
+    shift = np.array([2.0 * (Xt[0].max() - Xt[0].min()), 0.0, 0.0])[:, None, None, None]
+    Xr = Xt + shift
+    Xw = Xt + 2.0 * shift
+    GAM = rng.standard_normal((2, nxt))
+
+    # Indexed mesh and vortex line segments of the wings and the wake
+    conn, first = node_table(Xt[..., 0], nxt)
+    N = to_nodes(Xt, first)
+    nn = N.shape[1]
+    edges, seg, sign = segment_table(conn)
+    nS = edges.shape[1]
+    Nw = np.concatenate([N + (2.0 + k) * shift[:, :, 0] for k in range(WAKE_ROWS)], axis=1)
+    Xwr = to_corners(Nw, wake_table(conn, nn, WAKE_ROWS))
+    GAMw = rng.standard_normal((2, WAKE_ROWS * nxt))
+    edgesw, segw, signw = wake_segment_table(edges, seg, sign, nn, WAKE_ROWS)
+    St = concat_segments(*[source_segments(N[..., i], edges, seg, sign, GAM[i], nxt, nS)
+                           for i in range(2)])
+    Sw = concat_segments(*[source_segments(Nw[..., i], edgesw, segw, signw, GAMw[i],
+                                           WAKE_ROWS * nxt, WAKE_ROWS * nS) for i in range(2)])
+    S1, S2, GAMS = concat_segments(St, Sw)
+    ns_t = len(St[2])
+    K = (g.RCUT, 0.1 * g.hfactor_f, 4.0 * np.pi, 0.0)
+    angles = np.full(4, 0.1)
+    Nn, XCn, NCn = np.zeros_like(N), np.zeros_like(XC), np.zeros_like(NC)
+    Nr, XCr, NCr = np.zeros_like(N), np.zeros_like(XC), np.zeros_like(NC)
+
+    GAM_edges = GAM[0].repeat(4)
+    E1, E2 = element_segments(Xt, nxt)
+    LCUT = 0.1 * g.hfactor_f
+    zeros = np.zeros(2)
+    MVN = np.eye(4 * nxt) + 0.01 * rng.standard_normal((4 * nxt, 4 * nxt))
+    Vnc = rng.standard_normal((2, nxt))
+    x, y, z = XC[:, 0, 0]
+
+    return {
+        'mVORTEX': lambda: mVORTEX(x, y, z, E1[0, 0], E1[0, 1], E1[0, 2],
+                                   E2[0, 0], E2[0, 1], E2[0, 2], GAM_edges, g.RCUT, LCUT),
+        'element_vel': lambda: element_vel(XC[..., 0], nxt, E1[0], E2[0], nxt, g.RCUT),
+        'vel_by': lambda: vel_by(1, Xw[..., 0], nxt, Xt, GAM, nxt, Xr, GAM, nxt, g.RCUT, LCUT),
+        'cross_matrix': lambda: cross_matrix(XC[..., 0], NC[..., 0], nxt, E1[1], E2[1], nxt, g.RCUT),
+        'b_vel_B_by_T_matrix': lambda: b_vel_B_by_T_matrix(nxb, nxt, Xb, E1, E2, g.RCUT),
+        's_impulse_WT': lambda: s_impulse_WT(1, np.zeros(3), 0.0, Xt, Xwr, GAM, GAMw,
+                                             zeros, zeros, zeros, zeros),
+        'solution': lambda: solution(nxt, nxt, MVN, Vnc, Vnc, Vnc, Vnc),
+        'node_table': lambda: node_table(Xt[..., 0], nxt),
+        'wings_nodes_L2GT': lambda: wings_nodes_L2GT(angles, 0.0, angles, angles, np.zeros(4),
+                                                     np.zeros(3), 0.0, zeros,
+                                                     N[..., 0], XC[..., 0], NC[..., 0], Nn, XCn, NCn,
+                                                     N[..., 0], XC[..., 0], NC[..., 0], Nr, XCr, NCr),
+        'vel_batch_groups': lambda: vel_batch_groups([(Nw[..., i], 0, len(GAMS)) for i in range(2)],
+                                                     S1, S2, GAMS, ns_t, *K),
+        'n_vel_T_by_segments': lambda: n_vel_T_by_segments(nxt, XC[..., 0], NC[..., 0], *Sw, *K),
+    }
+
+
+def run(hfactor, nstep):
+    """Wall time of a simulate() run with the mesh and step count given"""
+    g.hfactor_f = g.hfactor_r = hfactor
+    g.nstep = nstep
+    start = time.perf_counter()
+    simulate()
+    return time.perf_counter() - start
+
+
+def exponent(sizes, times):
+    if len(sizes) < 2:
+        return float('nan')
+    return float(np.polyfit(np.log(sizes), np.log(times), 1)[0])
+
+
+def series(sizes, times):
+    return {'sizes': [int(s) for s in sizes], 'times': list(times),
+            'exponent': exponent(sizes, times)}
+
+
+def benchmark(levels, ratio, sim_levels, steps, repeat):
+    results = {}
+    hfactors = [g.hfactor_f / ratio**k for k in range(levels)]
+    g.save_data = False
+    g.stream_data = False
+    g.cache_enabled = False
+
+    kernels = {}
+    sizes = []
+    for hfactor in hfactors:
+        mesh = wings(hfactor)
+        sizes.append(mesh[1])
+        for name, f in kernel_cases(*mesh).items():
+            kernels.setdefault(name, []).append((mesh[1], best(f, repeat)))
+    for name, points in kernels.items():
+        results[name] = series(*zip(*points))
+
+    hfactor, nstep = g.hfactor_f, g.nstep
+    run(hfactor, min(steps))    # compile
+
+    times = [min(run(h, min(steps)) for _ in range(repeat)) for h in hfactors[:sim_levels]]
+    results['simulate_mesh'] = series(sizes[:sim_levels], times)
+    times = [min(run(hfactor, n) for _ in range(repeat)) for n in steps]
+    results['simulate_steps'] = series(steps, times)
+
+    g.hfactor_f = g.hfactor_r = hfactor
+    g.nstep = nstep
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Times slower than the baseline time of the same series and size by more than threshold"""
+    regressions = []
+    for name, s in results.items():
+        ref = dict(zip(baseline.get(name, {}).get('sizes', []),
+                       baseline.get(name, {}).get('times', [])))
+        for size, t in zip(s['sizes'], s['times']):
+            if size in ref and t > (1.0 + threshold) * ref[size]:
+                regressions.append((name, size, t, ref[size]))
+    return regressions
+
+
+def report(results, baseline):
+    print(f"{'series':<22}{'size':>8}{'time (ms)':>14}{'baseline (ms)':>16}{'ratio':>8}")
+    for name, s in results.items():
+        ref = dict(zip(baseline.get(name, {}).get('sizes', []),
+                       baseline.get(name, {}).get('times', [])))
+        for size, t in zip(s['sizes'], s['times']):
+            line = f"{name:<22}{size:>8}{1e3 * t:>14.4g}"
+            if size in ref:
+                line += f"{1e3 * ref[size]:>16.4g}{t / ref[size]:>8.2f}"
+            print(line)
+        line = f"{'':<22}{'exponent':>8}{s['exponent']:>14.2f}"
+        if name in baseline:
+            line += f"{baseline[name]['exponent']:>16.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the kernels and full runs")
+    parser.add_argument('--save', action='store_true', help="write the results as the baseline")
+    parser.add_argument('--baseline', type=Path, default=BASELINE,
+                        help=f"baseline file (default {BASELINE})")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="relative slowdown reported as a regression (default 0.25)")
+    parser.add_argument('--levels', type=int, default=4, help="meshes for the kernels (default 4)")
+    parser.add_argument('--ratio', type=float, default=np.sqrt(2.0),
+                        help="refinement ratio of hfactor between meshes (default sqrt(2))")
+    parser.add_argument('--sim-levels', type=int, default=2,
+                        help="meshes for the simulate() runs (default 2)")
+    parser.add_argument('--steps', type=int, nargs='+', default=[10, 20, 40],
+                        help="step counts for the simulate() runs (default 10 20 40)")
+    parser.add_argument('--repeat', type=int, default=5, help="timings per case (default 5)")
+    args = parser.parse_args()
+
+    results = benchmark(args.levels, args.ratio, args.sim_levels, args.steps, args.repeat)
+    baseline = {}
+    if not args.save and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())['results']
+
+    report(results, baseline)
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            'machine': platform.platform(), 'python': platform.python_version(),
+            'numpy': np.__version__, 'results': results}, indent=2))
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, size, t, ref in regressions:
+        print(f"REGRESSION {name} at size {size}: {1e3 * t:.4g} ms vs {1e3 * ref:.4g} ms "
+              f"(+{t / ref - 1.0:.0%}, threshold {args.threshold:.0%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,22 @@ import os
 import argparse
 import tombo.globals as g
 from tombo.simulate import run_simulation
-from tombo.plotting import create_directories, generate_plots, view_plot
+from tombo.plotting import create_directories, generate_plots, close_pool, view_plot, animate_wake
+from tombo.plotting import start_live_plots, finish_live_plots
+from tombo.converge import converge
+from tombo.timers import start_timers, stop_timers, summary, print_summary, export_json
 import time
 
 def tombo2(parser, args):
+    if args.profile is None:
+        run_simulation()
+        return
+
+    start_timers()
     run_simulation()
+    profile = summary(stop_timers())
+    print_summary(profile)
+    export_json(profile, args.profile)
 
 def generate_plots2(parser, args):
     if not os.path.isdir(args.data_folder):
@@ -14,6 +25,7 @@ def generate_plots2(parser, args):
 
     create_directories(g.plot_folder)                #can be merged
     generate_plots(args.data_folder, args.all)
+    close_pool()
 
 def view_plot2(parser, args):
     if not os.path.isfile(args.data_file):
@@ -21,10 +33,32 @@ def view_plot2(parser, args):
 
     view_plot(args.data_file)
 
+def animate_wake2(parser, args):
+    if not os.path.isdir(args.data_folder):
+        parser.exit("Invalid data folder path")
+
+    create_directories(g.plot_folder)
+    animate_wake(args.data_folder, args.output, args.fps)
+
 def sim_and_plot(parser, args):
-    run_simulation()
-    create_directories(g.plot_folder)               #can be merged
-    generate_plots(g.data_folder, args.all)
+    create_directories(g.plot_folder)
+    start_live_plots(args.all)
+    try:
+        run_simulation()
+        finish_live_plots()
+    except BaseException:
+        # Don't wait for the plots still queued when the simulation fails
+        close_pool(terminate=True)
+        raise
+    close_pool()
+
+def converge2(parser, args):
+    if args.levels < 2:
+        parser.exit(message="At least 2 levels are needed\n")
+    if args.ratio <= 1:
+        parser.exit(message="The refinement ratio must be > 1\n")
+
+    converge(args.levels, args.ratio, args.tol, args.jobs)
 
 def init_parsers():
     global_parser = argparse.ArgumentParser(
@@ -38,6 +72,18 @@ def init_parsers():
         'sim',
         help='run simulation (configurable with config.toml)'
     )
+    sim_parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=f'{g.output_folder}/profile.json',
+        default=None,
+        metavar='JSON',
+        help=("time each stage of the simulation, print a summary and save the "
+              "times of each step as JSON; by default, to profile.json in "
+              "output_folder specified in config.toml. The first step includes "
+              "the compilation of uncached kernels, so it is reported separately "
+              "and left out of the mean and maximum time per step")
+    )
     sim_parser.set_defaults(func=tombo2)
 
     # plot subcommand
@@ -76,6 +122,62 @@ def init_parsers():
     )
     simplot_parser.set_defaults(func=sim_and_plot)
 
+    # animate subcommand
+    animate_parser = subparsers.add_parser(
+        'animate',
+        help='animate wake evolution into a single video or GIF'
+    )
+    animate_parser.add_argument(
+        'data_folder',
+        nargs='?',
+        default=f'{g.data_folder}/wake',
+        help=("path to folder containing wake data generated by the simulation; "
+              "by default, uses the wake folder in data_folder specified in config.toml")
+    )
+    animate_parser.add_argument(
+        '-o', '--output',
+        default=f'{g.plot_folder}/wake.gif',
+        help="path of the animation; the extension selects the format (e.g. .gif, .mp4)"
+    )
+    animate_parser.add_argument(
+        '--fps',
+        type=int,
+        default=10,
+        help="frames per second"
+    )
+    animate_parser.set_defaults(func=animate_wake2)
+
+    # converge subcommand
+    converge_parser = subparsers.add_parser(
+        'converge',
+        help='run a mesh convergence study (configurable with config.toml)'
+    )
+    converge_parser.add_argument(
+        '-n', '--levels',
+        type=int,
+        default=3,
+        help="number of meshes, starting from the hfactor in config.toml"
+    )
+    converge_parser.add_argument(
+        '-r', '--ratio',
+        type=float,
+        default=2.0,
+        help="ratio by which hfactor is reduced from one mesh to the next"
+    )
+    converge_parser.add_argument(
+        '-t', '--tol',
+        type=float,
+        default=0.02,
+        help="target relative error of the time-averaged force and moment"
+    )
+    converge_parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help="number of simulations to run in parallel (default: all meshes at once)"
+    )
+    converge_parser.set_defaults(func=converge2)
+
     return global_parser
 
 def main():
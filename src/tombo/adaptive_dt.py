@@ -0,0 +1,48 @@
+import tombo.globals as g
+
+def adaptive_dt(dt_old, dV, rate, remaining):
+    """
+    Choose the time increment of the next step in adaptive mode
+
+    Parameters
+    ----------
+    dt_old: float
+        Time increment of the previous step
+    dV: float
+        Change in wake vortex velocity over the previous step; 0 if there
+        is no velocity history yet
+    rate: float
+        Maximum rotation rate (dphi / dt, dtheta / dt) of the wings
+    remaining: float
+        Time left until the end of the time march
+
+    Returns
+    -------
+    dt: float
+        Time increment, between g.dt_min and g.dt_max except for the
+        last two steps, which are shortened to end exactly on time
+    """
+    # Do not grow the step too quickly, to keep the multistep
+    # convection schemes stable
+    dt = min(g.dt_max, 2.0 * dt_old)
+
+    # Local error of the wake convection; dV is dominated by the vortices
+    # shed each step and does not shrink with dt_old, so it is not
+    # scaled by dt / dt_old
+    if dV > 0:
+        dt = min(dt, 2.0 * g.tol / dV)
+    # Limit the angle the wings rotate by in one step
+    if rate > 0:
+        dt = min(dt, g.dtheta_max / rate)
+
+    dt = max(dt, g.dt_min)
+
+    # Spread the remainder over the last two steps instead of ending
+    # with a tiny one (a remainder that exceeds dt by round-off only
+    # is taken in one step)
+    if remaining <= dt + 1e-6 * g.dt_min:
+        dt = remaining
+    elif remaining < 2.0 * dt:
+        dt = 0.5 * remaining
+
+    return dt
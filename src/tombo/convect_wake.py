@@ -0,0 +1,40 @@
+import numpy as np
+
+def convect_wake(Xw, VW, VW_old, nXw_old, dt, dt_old, scheme):
+    """
+    Convect wake vortices over one time step
+
+    Parameters
+    ----------
+    Xw: ndarray[j, ..., iXw, w]
+        Location of wake vortices (element corners [j, n, iXw, w] or
+        wake nodes [j, iNw, w])
+    VW: ndarray[j, ..., iXw, w]
+        Velocity of wake vortices at the current step
+    VW_old: ndarray[j, ..., iXw, w]
+        Velocity of wake vortices at the previous step
+    nXw_old: int
+        Number of wake vortices at the previous step; vortices shed after
+        it have no velocity history and are convected with forward Euler
+    dt: float
+        Time increment
+    dt_old: float
+        Time increment of the previous step
+    scheme: str
+        'euler' (forward Euler) or 'ab2' (2nd-order Adams-Bashforth)
+
+    Returns
+    -------
+    Xw: ndarray[j, ..., iXw, w]
+        Location of wake vortices after convection
+    """
+    Xw = Xw + dt * VW
+
+    if scheme == 'ab2':
+        # X += dt * ((1 + r/2) V_n - r/2 V_n-1) with r = dt / dt_old
+        # (3/2 and 1/2 for a constant step), written as a correction to Euler
+        s = nXw_old
+        r = dt / dt_old
+        Xw[..., :s, :] += 0.5 * r * dt * (VW[..., :s, :] - VW_old[..., :s, :])
+
+    return Xw
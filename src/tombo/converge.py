@@ -0,0 +1,125 @@
+import numpy as np
+from multiprocessing import Pool
+
+import tombo.globals as g
+from tombo.simulate import simulate
+
+def converge(levels=3, ratio=2.0, tol=0.02, jobs=None):
+    """
+    Mesh convergence study: run the simulation in config.toml on a sequence
+    of refined meshes in parallel, estimate the converged time-averaged
+    force and moment by Richardson extrapolation and report the coarsest
+    mesh within the tolerance
+
+    Parameters
+    ----------
+    levels: int
+        Number of meshes; mesh k has the border element heights
+        hfactor_f / ratio**k and hfactor_r / ratio**k
+    ratio: float
+        Refinement ratio between successive meshes
+    tol: float
+        Target relative error of the time-averaged force and moment
+    jobs: int
+        Number of simulations run at once (default: one per mesh)
+
+    Returns
+    -------
+    hfactors: ndarray[k, 2]
+        hfactor_f and hfactor_r of each mesh
+    errors: ndarray[k]
+        Relative error of each mesh (nan if it cannot be estimated)
+    best: int
+        Index of the coarsest mesh with errors <= tol, or None
+    """
+    hfactors = np.array([[g.hfactor_f, g.hfactor_r]]) / ratio**np.arange(levels)[:, np.newaxis]
+
+    with Pool(jobs or levels) as pool:
+        results = pool.map(mean_force_moment, hfactors)
+
+    # Mean force and moment vectors of each mesh, and their extrapolated values
+    F = np.array([f for f, _ in results])
+    M = np.array([m for _, m in results])
+    F0, pF = richardson(F, ratio)
+    M0, pM = richardson(M, ratio)
+
+    errors = np.maximum(relative_error(F, F0), relative_error(M, M0))
+    within = np.flatnonzero(errors <= tol)
+    best = within[0] if len(within) else None
+
+    report(hfactors, F, M, F0, M0, pF, pM, errors, tol, best)
+
+    return hfactors, errors, best
+
+def mean_force_moment(hfactor):
+    """
+    Time-averaged force and moment of a run with the given (front, rear)
+    border element heights
+    """
+    g.hfactor_f, g.hfactor_r = hfactor
+    g.save_data = False
+    g.stream_data = False
+
+    _, force, moment = simulate()
+
+    return force.mean(axis=1), moment.mean(axis=1)
+
+def richardson(f, ratio):
+    """
+    Richardson extrapolation of a quantity computed on meshes refined by a
+    constant ratio; the order of convergence is estimated from the three
+    finest meshes (1 is assumed if there are only two, or if the differences
+    do not decrease)
+
+    Parameters
+    ----------
+    f: ndarray[k, ...]
+        Values on the meshes, from coarsest to finest
+    ratio: float
+        Refinement ratio between successive meshes
+
+    Returns
+    -------
+    f0: ndarray[...]
+        Extrapolated value (the finest value if there is a single mesh)
+    p: float
+        Order of convergence
+    """
+    if len(f) < 2:
+        return f[-1], np.nan
+
+    p = 1.0
+    if len(f) >= 3:
+        d1 = np.linalg.norm(f[-2] - f[-3])
+        d2 = np.linalg.norm(f[-1] - f[-2])
+        if 0 < d2 < d1:
+            p = np.log(d1 / d2) / np.log(ratio)
+
+    return f[-1] + (f[-1] - f[-2]) / (ratio**p - 1.0), p
+
+def relative_error(f, f0):
+    """
+    Norm of the difference of each row of f from f0, relative to the norm
+    of f0; the finest mesh is the reference if the extrapolation failed
+    """
+    scale = np.linalg.norm(f0)
+    if scale == 0:
+        return np.full(len(f), np.nan)
+
+    return np.linalg.norm(f - f0, axis=1) / scale
+
+def report(hfactors, F, M, F0, M0, pF, pM, errors, tol, best):
+    print(f"{'hfactor_f':>10}{'hfactor_r':>10}"
+          f"{'mean force (x, y, z)':>40}{'mean moment (x, y, z)':>40}{'error':>10}")
+    for (hf, hr), f, m, e in zip(hfactors, F, M, errors):
+        print(f"{hf:>10.4g}{hr:>10.4g}{np.array2string(f, precision=4):>40}"
+              f"{np.array2string(m, precision=4):>40}{e:>10.2e}")
+    print(f"{'extrapolated':>20}{np.array2string(F0, precision=4):>40}"
+          f"{np.array2string(M0, precision=4):>40}")
+    print(f"observed order of convergence: force {pF:.2f}, moment {pM:.2f}")
+
+    if best is None:
+        print(f"no mesh is within the tolerance of {tol:g}; refine further")
+    else:
+        hf, hr = hfactors[best]
+        print(f"coarsest mesh within {tol:g}: hfactor_f = {hf:.4g}, hfactor_r = {hr:.4g}")
@@ -1,9 +1,9 @@
 import numpy as np
 from numba import njit
-from tombo.VORTEXm import VORTEXm
+from tombo.element_segments import element_vel
 
 @njit(cache=True)
-def cross_matrix(XC, NC, nxT, Xt, nxS, RCUT):
+def cross_matrix(XC, NC, nxT, E1, E2, nxS, RCUT):
     """
     Set up a sub-matrix for induced velocity on the target wing 
     due to bound vortices on the source wing. 
@@ -18,8 +18,9 @@ def cross_matrix(XC, NC, nxT, Xt, nxS, RCUT):
         Unit normal at the total collocation points on the target wing
     nxT: int
         Number of total elements on the target wing
-    Xt: ndarray[j, n, i]
-        Coordinates of the total elements on the source wing
+    E1, E2: ndarray[j, iE]
+        Edges of the total elements on the source wing, from
+        `element_segments()`
     nxS: int
         Number of total elements on the source wing
 
@@ -33,24 +34,10 @@ def cross_matrix(XC, NC, nxT, Xt, nxS, RCUT):
     # Use collocation point vector XC[j, i] and the unit normal vector 
     # NC[j, i] for the all collocation points.
     VN = np.zeros((nxT, nxS))
-    s = np.shape(XC)
+    C = element_vel(XC, nxT, E1, E2, nxS, RCUT)
 
     for i in range(nxS):
-        U = np.zeros(s[1])
-        V = np.zeros(s[1])
-        W = np.zeros(s[1])
-
-        for j in range(4):
-            k = (j + 1) % 4
-            dU, dV, dW = VORTEXm(XC[0, :], XC[1, :], XC[2, :],
-                                 Xt[0, j, i], Xt[1, j, i], Xt[2, j, i],
-                                 Xt[0, k, i], Xt[1, k, i], Xt[2, k, i],
-                                 1.0, RCUT)
-            U += dU
-            V += dV
-            W += dW
-
         # Normal velocity
-        VN[:, i] = (U * NC[0, :] + V * NC[1, :] + W * NC[2, :])
+        VN[:, i] = (C[0, :, i] * NC[0, :] + C[1, :, i] * NC[1, :] + C[2, :, i] * NC[2, :])
 
-    return VN
\ No newline at end of file
+    return VN
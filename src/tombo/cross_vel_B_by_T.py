@@ -1,6 +1,7 @@
 import numpy as np
 from numba import njit
 from tombo.mVORTEX import mVORTEX
+from tombo.vortex_segments import vortex_segments
 
 @njit(cache=True)
 def cross_vel_B_by_T(Xb, nXb, Xt, GAMA, nXt, RCUT, LCUT):
@@ -73,3 +74,40 @@ def cross_vel_B_by_T(Xb, nXb, Xt, GAMA, nXt, RCUT, LCUT):
             VBT[2, n, i] = w
 
     return VBT
+
+
+@njit(cache=True)
+def cross_vel_B_by_segments(Xb, nXb, S1, S2, GAMS, RCUT, LCUT, FOURPI, DELTA2):
+    """
+    Calculate velocity at border element nodes of wing i due to total vortices
+    on the wing j, given as vortex line segments (see `source_segments()`);
+    Xb, the segments and the constants (RCUT, LCUT, FOURPI = 4 * pi,
+    DELTA2) set the precision of the calculation (see `vortex_segments()`)
+
+    Parameters
+    ----------
+    Xb: ndarray[j, n, iXb]
+        Coordinate j of observation node n of the wake element (destination)
+    nXb: int
+        Number of border vortices (destination)
+    S1, S2: ndarray[j, iS]
+        Start and end points of the segments of the wing (source)
+    GAMS: ndarray[iS]
+        Circulation of the segments (source)
+
+    Returns
+    -------
+    VBT: ndarray[j, n, iXb]
+        Velocity at the border element nodes
+    """
+    VBT = np.zeros((3, 4, nXb))
+
+    for i in range(nXb):
+        for n in range(4):
+            u, v, w = vortex_segments(Xb[0, n, i], Xb[1, n, i], Xb[2, n, i], S1, S2, GAMS,
+                                      0, len(GAMS), RCUT, LCUT, FOURPI, DELTA2)
+            VBT[0, n, i] = u
+            VBT[1, n, i] = v
+            VBT[2, n, i] = w
+
+    return VBT
@@ -0,0 +1,97 @@
+import numpy as np
+from numba import njit
+
+def element_segments(X, nX):
+    """
+    Edges of the first nX elements as contiguous start and end point
+    arrays; edge n of element i is segment 4 * i + n
+
+    Parameters
+    ----------
+    X: ndarray[j, n, i, ...]
+        Coordinate j of corner n of element i (any trailing axes, e.g.
+        the wing axis, are moved to the front)
+    nX: int
+        Number of elements
+
+    Returns
+    -------
+    E1, E2: ndarray[..., j, iE]
+        Start and end points of the edges
+    """
+    lead = X.shape[3:]
+    X = X[:, :, :nX]
+    E1 = np.moveaxis(X, (0, 1, 2), (-3, -1, -2))
+    E2 = np.moveaxis(np.roll(X, -1, axis=1), (0, 1, 2), (-3, -1, -2))
+
+    return (np.ascontiguousarray(E1).reshape(lead + (3, 4 * nX)),
+            np.ascontiguousarray(E2).reshape(lead + (3, 4 * nX)))
+
+@njit(cache=True)
+def element_vel(T, nT, E1, E2, nX, RCUT):
+    """
+    Velocity coefficients at the targets due to unit-circulation elements;
+    a target on an edge or its extension gets no contribution from that edge
+
+    Parameters
+    ----------
+    T: ndarray[j, iT]
+        Coordinates of the targets
+    nT: int
+        Number of targets
+    E1, E2: ndarray[j, iE]
+        Edges of the elements, from `element_segments()`
+    nX: int
+        Number of elements
+
+    Returns
+    -------
+    C: ndarray[j, iT, i]
+        Velocity at target iT due to element i with unit circulation
+    """
+    C = np.zeros((3, nT, nX))
+
+    for i in range(nX):
+        for t in range(nT):
+            x = T[0, t]
+            y = T[1, t]
+            z = T[2, t]
+            u = 0.0
+            v = 0.0
+            w = 0.0
+
+            for k in range(4 * i, 4 * i + 4):
+                x_diff1 = x - E1[0, k]
+                y_diff1 = y - E1[1, k]
+                z_diff1 = z - E1[2, k]
+                x_diff2 = x - E2[0, k]
+                y_diff2 = y - E2[1, k]
+                z_diff2 = z - E2[2, k]
+
+                R1R2X = y_diff1 * z_diff2 - z_diff1 * y_diff2
+                R1R2Y = z_diff1 * x_diff2 - x_diff1 * z_diff2
+                R1R2Z = x_diff1 * y_diff2 - y_diff1 * x_diff2
+                SQUARE = R1R2X * R1R2X + R1R2Y * R1R2Y + R1R2Z * R1R2Z
+
+                R1 = np.sqrt(x_diff1 * x_diff1 + y_diff1 * y_diff1 + z_diff1 * z_diff1)
+                R2 = np.sqrt(x_diff2 * x_diff2 + y_diff2 * y_diff2 + z_diff2 * z_diff2)
+
+                # Skip edges the target lies on (or on their extension)
+                if R1 <= RCUT or R2 <= RCUT or SQUARE <= RCUT:
+                    continue
+
+                ROR1 = (E2[0, k] - E1[0, k]) * x_diff1 + (E2[1, k] - E1[1, k]) * y_diff1 \
+                    + (E2[2, k] - E1[2, k]) * z_diff1
+                ROR2 = (E2[0, k] - E1[0, k]) * x_diff2 + (E2[1, k] - E1[1, k]) * y_diff2 \
+                    + (E2[2, k] - E1[2, k]) * z_diff2
+
+                COEF = 1.0 / (4.0 * np.pi * SQUARE) * (ROR1 / R1 - ROR2 / R2)
+                u += R1R2X * COEF
+                v += R1R2Y * COEF
+                w += R1R2Z * COEF
+
+            C[0, t, i] = u
+            C[1, t, i] = v
+            C[2, t, i] = w
+
+    return C
@@ -2,6 +2,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import splev, splrep, splder
 import tombo.globals as g
+from tombo.plotting import save_plot_data
+
+# File the per-step force and moment estimates are streamed to, kept open
+# during the time march
+_stream = None
 
 def force_moment(rho_, v_, d_, nstep, dt, U,
                  limpa_f, limpa_r, aimpa_f, aimpa_r,
@@ -41,6 +46,15 @@ def force_moment(rho_, v_, d_, nstep, dt, U,
         Angular impulse from wake vortices (front)
     aimpw_r: ndarray[j, n, i]
         Angular impulse from wake vortices (rear)
+
+    Returns
+    -------
+    times: ndarray[n]
+        Sample times
+    force: ndarray[j, n]
+        Force acting on the wings
+    moment: ndarray[j, n]
+        Moment acting on the wings
     """
     # Reference values of force and moment
     f_ = rho_ * (v_ * d_)**2
@@ -49,25 +63,8 @@ def force_moment(rho_, v_, d_, nstep, dt, U,
     # Translational velocity of the moving inertia system
     U0 = -U
 
-    # Combine impulses
-    # Front wings
-    limps_f = limpa_f + limpw_f
-    aimps_f = aimpa_f + aimpw_f
-    # Rear wings
-    limps_r = limpa_r + limpw_r
-    aimps_r = aimpa_r + aimpw_r
-
-    # Add contributions from nwing/2 wings
-    # Front wings
-    limp_f = limps_f[:, :, 0] + limps_f[:, :, 1]
-    aimp_f = aimps_f[:, :, 0] + aimps_f[:, :, 1]
-    # Rear wings
-    limp_r = limps_r[:, :, 0] + limps_r[:, :, 1]
-    aimp_r = aimps_r[:, :, 0] + aimps_r[:, :, 1]
-
-    # Add contributions from front and rear wings
-    limp = limp_f + limp_r
-    aimp = aimp_f + aimp_r
+    limp, aimp = total_impulse(limpa_f, limpa_r, aimpa_f, aimpa_r,
+                               limpw_f, limpw_r, aimpw_f, aimpw_r)
 
     # Get the splines and their derivatives for the impulses
     for i in range(g.nwing):
@@ -112,19 +109,183 @@ def force_moment(rho_, v_, d_, nstep, dt, U,
     momenty = -m_ * momenty
     momentz = -m_ * momentz
 
-    if g.save_data:
-        # Save data for plotting forces
-        np.savez(f'{g.data_folder}/force/force_x',
-                times=times, force=forcex)
-        np.savez(f'{g.data_folder}/force/force_y',
-                times=times, force=forcey)
-        np.savez(f'{g.data_folder}/force/force_z',
-                times=times, force=forcez)
-
-        # Save data for plotting moments
-        np.savez(f'{g.data_folder}/moment/moment_x',
-                times=times, moment=momentx)
-        np.savez(f'{g.data_folder}/moment/moment_y',
-                times=times, moment=momenty)
-        np.savez(f'{g.data_folder}/moment/moment_z',
-                times=times, moment=momentz)
+    # Save data for plotting forces
+    save_plot_data('force', 'force_x', times=times, force=forcex)
+    save_plot_data('force', 'force_y', times=times, force=forcey)
+    save_plot_data('force', 'force_z', times=times, force=forcez)
+
+    # Save data for plotting moments
+    save_plot_data('moment', 'moment_x', times=times, moment=momentx)
+    save_plot_data('moment', 'moment_y', times=times, moment=momenty)
+    save_plot_data('moment', 'moment_z', times=times, moment=momentz)
+
+    return (times, np.array([forcex, forcey, forcez]),
+            np.array([momentx, momenty, momentz]))
+
+
+def force_moment_step(rho_, v_, d_, istep, times, U,
+                      limpa_f, limpa_r, aimpa_f, aimpa_r,
+                      limpw_f, limpw_r, aimpw_f, aimpw_r
+):
+    """
+    Estimate force and moment on the wings at the current step
+
+    Unlike `force_moment()`, which fits splines to the full impulse
+    history after the time march, this uses one-sided finite differences
+    over the last (up to) three steps, so an estimate is available while
+    the simulation is still running.
+
+    Parameters
+    ----------
+    rho_: float
+        Air density
+    v_: float
+        Reference stroke veloctiy
+    d_: float
+        Reference stroke length
+    istep: int
+        Current iteration step
+    times: ndarray[n]
+        Times of the impulses, filled up to istep (same time axis as
+        `force_moment()`, i.e. dt * (istep + 1) for a uniform step)
+    U: ndarray
+        Ambient velocity in (x, y, z) (nondimensional)
+    limpa_f, limpa_r, aimpa_f, aimpa_r: ndarray[j, n, i]
+        Linear and angular impulses from bound vortices, filled up to istep
+    limpw_f, limpw_r, aimpw_f, aimpw_r: ndarray[j, n, i]
+        Linear and angular impulses from wake vortices, filled up to istep
+
+    Returns
+    -------
+    time: float
+        Time of the estimate
+    force: ndarray[j]
+        Force acting on the wings
+    moment: ndarray[j]
+        Moment acting on the wings
+    """
+    # Reference values of force and moment
+    f_ = rho_ * (v_ * d_)**2
+    m_ = f_ * d_
+
+    # Translational velocity of the moving inertia system
+    U0 = -U
+
+    n0 = max(istep - 2, 0)
+    limp, aimp = total_impulse(limpa_f[:, n0:istep + 1], limpa_r[:, n0:istep + 1],
+                               aimpa_f[:, n0:istep + 1], aimpa_r[:, n0:istep + 1],
+                               limpw_f[:, n0:istep + 1], limpw_r[:, n0:istep + 1],
+                               aimpw_f[:, n0:istep + 1], aimpw_r[:, n0:istep + 1])
+
+    # Time derivatives of the impulses
+    if istep == 0:
+        dlimp = np.zeros(3)
+        daimp = np.zeros(3)
+    elif istep == 1:
+        h = times[1] - times[0]
+        dlimp = (limp[:, 1] - limp[:, 0]) / h
+        daimp = (aimp[:, 1] - aimp[:, 0]) / h
+    else:
+        # Three-point backward difference for (possibly) unequal steps
+        h0 = times[istep - 1] - times[istep - 2]
+        h1 = times[istep] - times[istep - 1]
+        c = np.array([h1 / (h0 * (h0 + h1)),
+                      -(h0 + h1) / (h0 * h1),
+                      (2.0 * h1 + h0) / (h1 * (h0 + h1))])
+        dlimp = limp @ c
+        daimp = aimp @ c
+
+    # Reverse the sign to get forces/moments acting on the wing
+    force = -f_ * dlimp
+    moment = -m_ * (daimp + np.cross(U0, limp[:, -1]))
+
+    return times[istep], force, moment
+
+def resample_impulse(times, imp, times_new):
+    """
+    Resample an impulse history onto new times by spline interpolation;
+    used to map the impulses of an adaptive time march onto the uniform
+    time grid expected by `force_moment()`
+
+    Parameters
+    ----------
+    times: ndarray[n]
+        Times of the impulses
+    imp: ndarray[j, n, i]
+        Impulse history
+    times_new: ndarray[m]
+        Times to resample onto
+
+    Returns
+    -------
+    imp_new: ndarray[j, m, i]
+        Resampled impulse history
+    """
+    k = min(3, len(times) - 1)
+    imp_new = np.zeros((imp.shape[0], len(times_new), imp.shape[2]))
+    for j in range(imp.shape[0]):
+        for i in range(imp.shape[2]):
+            imp_new[j, :, i] = splev(times_new, splrep(times, imp[j, :, i], k=k))
+
+    return imp_new
+
+def stream_force_moment(istep, time, force, moment):
+    """
+    Append the force and moment estimate of one step to
+    `force_moment_stream.csv` in the output folder. The file is created at
+    step 0 and kept open until `close_stream()`; each line is flushed so
+    that it can be followed while the simulation runs.
+    """
+    global _stream
+
+    if istep == 0:
+        close_stream()
+        _stream = open(f'{g.output_folder}/force_moment_stream.csv', 'w')
+        _stream.write("istep,time,force_x,force_y,force_z,moment_x,moment_y,moment_z\n")
+    _stream.write(f"{istep},{time:.6e},"
+                  + ",".join(f"{value:.6e}" for value in (*force, *moment))
+                  + "\n")
+    _stream.flush()
+
+def close_stream():
+    """Close the file of `stream_force_moment()`, if it is open"""
+    global _stream
+
+    if _stream is not None:
+        _stream.close()
+        _stream = None
+
+def total_impulse(limpa_f, limpa_r, aimpa_f, aimpa_r,
+                  limpw_f, limpw_r, aimpw_f, aimpw_r):
+    """
+    Combine the linear and angular impulses of the bound and wake
+    vortices of all wings
+
+    Returns
+    -------
+    limp: ndarray[j, n]
+        Total linear impulse
+    aimp: ndarray[j, n]
+        Total angular impulse
+    """
+    # Combine impulses
+    # Front wings
+    limps_f = limpa_f + limpw_f
+    aimps_f = aimpa_f + aimpw_f
+    # Rear wings
+    limps_r = limpa_r + limpw_r
+    aimps_r = aimpa_r + aimpw_r
+
+    # Add contributions from nwing/2 wings
+    # Front wings
+    limp_f = limps_f[:, :, 0] + limps_f[:, :, 1]
+    aimp_f = aimps_f[:, :, 0] + aimps_f[:, :, 1]
+    # Rear wings
+    limp_r = limps_r[:, :, 0] + limps_r[:, :, 1]
+    aimp_r = aimps_r[:, :, 0] + aimps_r[:, :, 1]
+
+    # Add contributions from front and rear wings
+    limp = limp_f + limp_r
+    aimp = aimp_f + aimp_r
+
+    return limp, aimp
@@ -0,0 +1,148 @@
+import os
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import tombo.globals as g
+from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh, save_mesh_plot_data
+from tombo.lr_set_matrix import lr_set_matrix
+from tombo.element_segments import element_segments
+
+# Bump when the layout of the cached arrays or the way they are computed
+# changes, so that stale entries are never reused
+VERSION = 1
+
+MESH_KEYS = ('Xb', 'nXb', 'Nb', 'Xc', 'nXc', 'Nc', 'l_', 'c_', 'h')
+
+def cached_mesh(wing, lt_, lr_, bang_, hfactor, wfactor):
+    """
+    `symmetric_5_sided_mesh()`, reused from the on-disk cache when a mesh of
+    the same geometry (including the camber, ielong and grading settings) was
+    generated before; the mesh plot data is saved either way
+    """
+    key = digest('mesh', lt_, lr_, bang_, hfactor, wfactor,
+                 g.icamber, g.acamber, g.ielong, g.chord_grading, g.span_grading)
+    data = load(key)
+
+    if data is None:
+        mesh = symmetric_5_sided_mesh(wing, lt_, lr_, bang_, hfactor, wfactor)
+        store(key, **dict(zip(MESH_KEYS, mesh)))
+        return mesh
+
+    mesh = tuple(data[k][()] for k in MESH_KEYS)
+    save_mesh_plot_data(wing, *mesh[:6])
+
+    return mesh
+
+def cached_self_matrix(xt, nxt, xC, nC, RCUT):
+    """
+    Self-coefficient matrices of a pair of wings, `lr_set_matrix()`, reused
+    from the on-disk cache; the key is the content of the (nondimensional)
+    total elements and collocation points, so any change of the geometry or
+    of its length scale gives a new entry
+
+    Parameters
+    ----------
+    xt: ndarray[j, n, i]
+        Total elements of the right wing (wing-fixed)
+    nxt: int
+        Number of total elements
+    xC, nC: ndarray[j, i]
+        Collocation points and unit normals of the right wing (wing-fixed)
+    RCUT: float
+        Cutoff distance
+
+    Returns
+    -------
+    MVNs: ndarray[nxt, nxt, 2]
+        As in `lr_set_matrix()`
+    """
+    key = digest('self_matrix', xt[:, :, :nxt], xC, nC, RCUT)
+    data = load(key)
+
+    if data is None:
+        MVNs = lr_set_matrix(*element_segments(xt, nxt), nxt, xC, nC, RCUT)
+        store(key, MVNs=MVNs)
+        return MVNs
+
+    return data['MVNs']
+
+def identical_wings():
+    """
+    True if the front and rear wings have the same shape (and mesh)
+    """
+    return (g.lt_f, g.lr_f, g.bang_f, g.hfactor_f, g.wfactor_f) == \
+        (g.lt_r, g.lr_r, g.bang_r, g.hfactor_r, g.wfactor_r)
+
+
+# Helper functions
+def digest(*items):
+    """
+    Content hash of the items (arrays by dtype, shape and data)
+    """
+    h = hashlib.sha256(f'{VERSION}'.encode())
+
+    for x in items:
+        if isinstance(x, np.ndarray):
+            x = np.ascontiguousarray(x)
+            h.update(f'{x.dtype}{x.shape}'.encode())
+            h.update(x.tobytes())
+        else:
+            h.update(repr(x).encode())
+
+    return h.hexdigest()
+
+def load(key):
+    """
+    Arrays of a cache entry, or None if caching is disabled or there is
+    no entry; a hit marks the entry as recently used
+    """
+    if not g.cache_enabled:
+        return None
+
+    path = Path(g.cache_folder) / f'{key}.npz'
+
+    try:
+        with np.load(path) as file:
+            data = dict(file)
+        os.utime(path)
+    except (OSError, ValueError, EOFError):
+        # Missing, or removed / half written by another process
+        return None
+
+    return data
+
+def store(key, **arrays):
+    """
+    Write a cache entry and evict the least recently used entries beyond
+    the size limit; the entry is written under a temporary name and renamed,
+    so concurrent runs never read a partial file
+    """
+    if not g.cache_enabled:
+        return
+
+    folder = Path(g.cache_folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    tmp = folder / f'{key}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(tmp, folder / f'{key}.npz')
+
+    evict(folder, g.cache_max_size * 1024**2)
+
+def evict(folder, max_bytes):
+    entries = []
+    for path in folder.glob('*.npz'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    size = sum(s for _, s, _ in entries)
+    for _, s, path in sorted(entries):
+        if size <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        size -= s
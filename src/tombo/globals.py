@@ -10,6 +10,9 @@ with open('config.toml', mode='rb') as file:
 solver = config['general']['solver']
 save_data = config['general']['save_data']
 flush_directories = config['general']['flush_directories']
+stream_data = config['general']['stream_data']
+force_limit = config['general']['force_limit']
+precision = config['general']['precision']
 
 # Plotting
 # --------
@@ -26,6 +29,12 @@ plot_enabled = config['plotting']['plot_enabled']
 
 dt = config['time']['dt']
 nstep = config['time']['nstep']
+scheme = config['time']['scheme']
+adaptive = config['time']['adaptive']
+tol = config['time']['tol']
+dtheta_max = config['time']['dtheta_max']
+dt_min = config['time']['dt_min']
+dt_max = config['time']['dt_max']
 
 
 # Body geometry
@@ -48,6 +57,8 @@ hfactor_f = config['wing_geometry']['hfactor_f']
 wfactor_f = config['wing_geometry']['wfactor_f']
 hfactor_r = config['wing_geometry']['hfactor_r']
 wfactor_r = config['wing_geometry']['wfactor_r']
+chord_grading = config['wing_geometry']['chord_grading']
+span_grading = config['wing_geometry']['span_grading']
 
 lt_f = config['wing_geometry']['lt_f']
 lr_f = config['wing_geometry']['lr_f']
@@ -86,6 +97,16 @@ U_ = np.array(config['fluid']['U_'])
 # ---------------
 
 RCUT = config['tolerance']['RCUT']
+core = config['tolerance']['core']
+core_radius = config['tolerance']['core_radius']
+
+
+# Cache
+# -----
+
+cache_enabled = config['cache']['enabled']
+cache_folder = config['cache']['folder']
+cache_max_size = config['cache']['max_size']
 
 
 """Check config values"""
@@ -98,3 +119,33 @@ if np.any(np.abs(rtOff) > 0.5):
 
 if np.any((tau < 0) | (tau >= 2)):
     raise ValueError("0 <= tau < 2 must be satisfied for all wings")
+
+if np.any((mpath < 0) | (mpath > 4)):
+    raise ValueError("mpath must be 0 - 4 for all wings (5 is not implemented)")
+
+if scheme not in ('euler', 'ab2'):
+    raise ValueError("scheme must be 'euler' or 'ab2'")
+
+if tol <= 0 or dtheta_max <= 0:
+    raise ValueError("tol and dtheta_max must be > 0")
+
+if not 0 < dt_min <= dt_max:
+    raise ValueError("0 < dt_min <= dt_max must be satisfied")
+
+if force_limit < 0:
+    raise ValueError("force_limit must be >= 0")
+
+if precision not in ('double', 'mixed'):
+    raise ValueError("precision must be 'double' or 'mixed'")
+
+if core not in ('cutoff', 'smooth'):
+    raise ValueError("core must be 'cutoff' or 'smooth'")
+
+if core_radius <= 0:
+    raise ValueError("core_radius must be > 0")
+
+if chord_grading < 1 or span_grading < 1:
+    raise ValueError("chord_grading and span_grading must be >= 1")
+
+if cache_max_size <= 0:
+    raise ValueError("cache max_size must be > 0")
@@ -1,4 +1,5 @@
 import numpy as np
+from numba import njit
 
 def lr_mass_L2GT(
     iwing, 
@@ -185,3 +186,87 @@ def lr_L2T_2(iwing, x, n, beta, delta, phi, theta):
     X[2, :] = -cb * xb[0, :] + sb * xb[2, :]
 
     return X
+
+@njit(cache=True)
+def wings_nodes_L2GT(beta, delta, phi, theta, a, U, t, b,
+                     xn_f, xC_f, nC_f, Xn_f, XC_f, NC_f,
+                     xn_r, xC_r, nC_r, Xn_r, XC_r, NC_r):
+    """
+    `lr_mass_L2GT()` for all four wings in a single pass, for an indexed
+    mesh: the unique nodes of the total elements are transformed once
+    each, and the element corners are then gathered from them by the
+    connectivity table (see `node_table()`); the results for wing i
+    (0, 1: front right and left; 2, 3: rear right and left) are written
+    into the buffers Xn_f[..., i], XC_f[..., i] and NC_f[..., i] of the
+    front pair or Xn_r[..., i - 2], XC_r[..., i - 2] and NC_r[..., i - 2]
+    of the rear pair
+
+    Parameters
+    ----------
+    beta, phi, theta, a: ndarray[4]
+        Stroke plane angle, rolling angle, rotation angle and rotation
+        axis offset of the four wings
+    b: ndarray[2]
+        Offset of the front and rear pair
+    xn_f, xn_r: ndarray[j, iN]
+        Nodes of the total elements on the front and rear wing (wing-fixed)
+    Xn_f, Xn_r: ndarray[j, iN, 2]
+        Buffers for the nodes of the two wings of each pair (global)
+    delta, U, t, xC_f, nC_f, xC_r, nC_r:
+        As in `lr_mass_L2GT()`, for the front and rear wing
+    """
+    for w in range(4):
+        m = w // 2          # Front (0) or rear (1) pair
+        side = w % 2        # Right (0) or left (1) wing
+        if m == 0:
+            xn, xC, nC, Xn, XC, NC = xn_f, xC_f, nC_f, Xn_f, XC_f, NC_f
+        else:
+            xn, xC, nC, Xn, XC, NC = xn_r, xC_r, nC_r, Xn_r, XC_r, NC_r
+
+        # Translating inertia to global
+        O0 = -U[0] * t + b[m] * np.cos(delta)
+        O1 = -U[1] * t
+        O2 = -U[2] * t - b[m] * np.sin(delta)
+
+        cth = np.cos(theta[w])
+        sth = np.sin(theta[w])
+        cph = np.cos(phi[w])
+        sph = np.sin(phi[w])
+        flip = side == 1    # Flip left wing coordinates
+        cb = np.cos(beta[w] - delta)
+        sb = np.sin(beta[w] - delta)
+
+        c = (a[w], cth, sth, cph, sph, flip, cb, sb)
+        l2g_points(xn, Xn, side, O0, O1, O2, *c)
+        l2g_points(xC, XC, side, O0, O1, O2, *c)
+        # Free vector: no rotation offset or translation
+        l2g_points(nC, NC, side, 0.0, 0.0, 0.0, 0.0, cth, sth, cph, sph, flip, cb, sb)
+
+@njit(cache=True)
+def l2g_points(x, X, w, O0, O1, O2, a, cth, sth, cph, sph, flip, cb, sb):
+    """
+    Transform the points x[j, i] of wing w to the global system
+    """
+    for i in range(x.shape[1]):
+        x0, x1, x2 = l2t_point(x[0, i], x[1, i], x[2, i],
+                               a, cth, sth, cph, sph, flip, cb, sb)
+        X[0, i, w] = O0 + x0
+        X[1, i, w] = O1 + x1
+        X[2, i, w] = O2 + x2
+
+@njit(cache=True)
+def l2t_point(x0, x1, x2, a, cth, sth, cph, sph, flip, cb, sb):
+    """
+    Transform a point from the wing-fixed to the translating system
+    (same operations as `lr_L2G_1()`)
+    """
+    # Local to flap plane inertia system
+    xb0 =        cth * (x0 + a)                 + sth * x2
+    xb1 =  sph * sth * (x0 + a) + cph * x1 - sph * cth * x2
+    xb2 = -cph * sth * (x0 + a) + sph * x1 + cph * cth * x2
+
+    if flip:
+        xb1 = -xb1
+
+    # From flap plane inertia to translating inertia
+    return sb * xb0 + cb * xb2, xb1, -cb * xb0 + sb * xb2
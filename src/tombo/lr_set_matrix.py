@@ -1,9 +1,9 @@
 import numpy as np
 from numba import njit
-from tombo.VORTEXm import VORTEXm
+from tombo.element_segments import element_vel
 
 @njit(cache=True)
-def lr_set_matrix(Xt, nXt, XC, NC, RCUT):
+def lr_set_matrix(E1, E2, nXt, XC, NC, RCUT):
     """
     Set up a self-coefficient matrix for the nonpenetration condition on the 
     airfoil surface: coefficient matrix of normal vel by itself
@@ -12,8 +12,8 @@ def lr_set_matrix(Xt, nXt, XC, NC, RCUT):
     ----------
     iwing: int
         0 (right wing), 1 (left wing)
-    Xt: ndarray[j, n, i]
-        Coordinates of total elements on the wing
+    E1, E2: ndarray[j, iE]
+        Edges of the total elements on the wing, from `element_segments()`
     nXt: int
         Number of total elements on the wing
     XC: ndarray[j, i]
@@ -26,39 +26,19 @@ def lr_set_matrix(Xt, nXt, XC, NC, RCUT):
     VN: ndarray[nXt, nXt]
         Matrix for the nonpenetration condition
     """
-    # Create copies to avoid mutating the original arrays
-    # in the case of left wing (iwing == 1)
-    Xt__ = Xt.copy()
-    XC__ = XC.copy()
-    NC__ = NC.copy()
-
     VN = np.zeros((nXt, nXt, 2)) # 2 for right and left wing
-    VN[:, :, 0] = one_side(Xt, nXt, XC, NC, RCUT)
+    VN[:, :, 0] = one_side(E1, E2, nXt, XC, NC, RCUT)
     VN[:, :, 1] = -VN[:, :, 0]  # Left side is just a mirror of the right
 
     return VN
 
 @njit(cache=True)
-def one_side(Xt, nXt, XC, NC, RCUT):
+def one_side(E1, E2, nXt, XC, NC, RCUT):
     VN = np.zeros((nXt, nXt))
-    s = XC.shape
+    C = element_vel(XC, XC.shape[1], E1, E2, nXt, RCUT)
 
     for i in range(nXt):
-        U = np.zeros(s[1])
-        V = np.zeros(s[1])
-        W = np.zeros(s[1])
-
-        for n in range(4):
-            k = (n + 1) % 4
-            dU, dV, dW = VORTEXm(XC[0], XC[1], XC[2],
-                                 Xt[0, n, i], Xt[1, n, i], Xt[2, n, i],
-                                 Xt[0, k, i], Xt[1, k, i], Xt[2, k, i],
-                                 1.0, RCUT)
-            U += dU
-            V += dV
-            W += dW
-
         # Normal velocity
-        VN[:, i] = U * NC[0] + V * NC[1] + W * NC[2]
+        VN[:, i] = C[0, :, i] * NC[0] + C[1, :, i] * NC[1] + C[2, :, i] * NC[2]
 
-    return VN
\ No newline at end of file
+    return VN
@@ -1,6 +1,8 @@
 import numpy as np
+from numba import njit
 from matplotlib import pyplot as plt
 import tombo.globals as g
+from tombo.plotting import save_plot_data
 
 def lrs_wing_NVs(m, iwing, xC, XC, NC, t, theta, phi, dph, dth, a, beta, U):
     """
@@ -68,8 +70,70 @@ def lrs_wing_NVs(m, iwing, xC, XC, NC, t, theta, phi, dph, dth, a, beta, U):
     # Save data for plotting
     labels = [['fr', 'fl'], ['rr', 'rl']]
 
-    if g.save_data:
-        np.savez(f'{g.data_folder}/airfoil_vel/airfoil_vel_{labels[m][iwing]}_{t:.4f}',
-                 Vnc=Vnc, XC=XC, NC=NC)
+    save_plot_data('airfoil_vel', f'airfoil_vel_{labels[m][iwing]}_{t:.4f}',
+                   Vnc=Vnc, XC=XC, NC=NC)
     
     return Vnc
+
+def wings_NVs(xC_f, XC_f, NC_f, xC_r, XC_r, NC_r, t, theta, phi, dph, dth, a, beta, U,
+              Vnc_f, Vnc_r):
+    """
+    `lrs_wing_NVs()` for all four wings in one call; the normal velocity
+    of wing i of the front (i = 0: right, 1: left) and rear (i = 2, 3)
+    pair is written into the buffer Vnc_f[i, :] or Vnc_r[i - 2, :]
+
+    Parameters
+    ----------
+    xC_f, xC_r: ndarray[j, i]
+        Collocation points of the front and rear wing (wing-fixed)
+    XC_f, NC_f, XC_r, NC_r: ndarray[j, i, iwing]
+        Collocation points and unit normals of the wings of each pair (global)
+    theta, phi, dph, dth, a, beta: ndarray[4]
+        Motion parameters of the four wings
+    t, U:
+        As in `lrs_wing_NVs()`
+    """
+    wings_NVs_kernel(xC_f, NC_f, xC_r, NC_r, theta, phi, dph, dth, a, beta, U, Vnc_f, Vnc_r)
+
+    # Save data for plotting
+    labels = [['fr', 'fl'], ['rr', 'rl']]
+
+    for m, (XC, NC, Vnc) in enumerate([(XC_f, NC_f, Vnc_f), (XC_r, NC_r, Vnc_r)]):
+        for iwing in range(Vnc.shape[0]):
+            save_plot_data('airfoil_vel', f'airfoil_vel_{labels[m][iwing]}_{t:.4f}',
+                           Vnc=Vnc[iwing], XC=XC[:, :, iwing], NC=NC[:, :, iwing])
+
+@njit(cache=True)
+def wings_NVs_kernel(xC_f, NC_f, xC_r, NC_r, theta, phi, dph, dth, a, beta, U, Vnc_f, Vnc_r):
+    """
+    Normal velocity of the wings (see `wings_NVs()`)
+    """
+    for w in range(4):
+        side = w % 2        # Right (0) or left (1) wing
+        if w < 2:
+            xC, NC, Vnc = xC_f, NC_f, Vnc_f
+        else:
+            xC, NC, Vnc = xC_r, NC_r, Vnc_r
+
+        sbt = np.sin(beta[w])
+        cbt = np.cos(beta[w])
+        sth = np.sin(theta[w])
+        cth = np.cos(theta[w])
+        sph = np.sin(phi[w])
+        cph = np.cos(phi[w])
+
+        for i in range(Vnc.shape[1]):
+            ab = -sth * (xC[0, i] + a[w]) + cth * xC[2, i]
+            xb =  cth * (xC[0, i] + a[w]) + sth * xC[2, i]
+            vxb = dth[w] * ab
+            vyb =  sph * dth[w] * xb - cph * dph[w] * ab - sph * dph[w] * xC[1, i]
+            vzb = -cph * dth[w] * xb - sph * dph[w] * ab + cph * dph[w] * xC[1, i]
+
+            if side == 1:   # Flip left wing coordinates
+                vyb = -vyb
+
+            vx = -U[0] + sbt * vxb + cbt * vzb
+            vy = -U[1] + vyb
+            vz = -U[2] - cbt * vxb + sbt * vzb
+
+            Vnc[side, i] = vx * NC[0, i, side] + vy * NC[1, i, side] + vz * NC[2, i, side]
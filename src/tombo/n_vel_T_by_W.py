@@ -1,6 +1,7 @@
 import numpy as np
 from numba import njit
 from tombo.mVORTEX import mVORTEX
+from tombo.vortex_segments import vortex_segments
 
 @njit(cache=True)
 def n_vel_T_by_W(istep, nXt, XC, NC, Xw2_f, GAMAw2_f, nXw_f, Xw2_r, GAMAw2_r, nXw_r, RCUT, LCUT):
@@ -94,4 +95,40 @@ def helper(XC, nXt, Vncw, Xw, GAMw, NC, RCUT, LCUT):
         v = v + v4
         w = w + w4
     
-        Vncw[i] += u * NC[0, i] + v * NC[1, i] + w * NC[2, i]
\ No newline at end of file
+        Vncw[i] += u * NC[0, i] + v * NC[1, i] + w * NC[2, i]
+
+@njit(cache=True)
+def n_vel_T_by_segments(nXt, XC, NC, S1, S2, GAMS, RCUT, LCUT, FOURPI, DELTA2):
+    """
+    Calculate normal velocity contribution on the airfoil by wake vortices,
+    given as vortex line segments (see `source_segments()`); XC, the
+    segments and the constants (RCUT, LCUT, FOURPI = 4 * pi, DELTA2) set the
+    precision of the calculation (see `vortex_segments()`)
+
+    Parameters
+    ----------
+    nXt: int
+        Number of collocation points
+    XC: ndarray[3, nXt]
+        Total collocation points
+    NC: ndarray[3, nXt]
+        Unit normal at the collocation points
+    S1, S2: ndarray[3, iS]
+        Start and end points of the wake segments of all wings
+    GAMS: ndarray[iS]
+        Circulation of the wake segments
+
+    Returns
+    -------
+    Vncw: ndarray[nXt]
+        Normal velocity components at the collocation points due to
+        wake vortices
+    """
+    Vncw = np.zeros(nXt)
+
+    for i in range(nXt):
+        u, v, w = vortex_segments(XC[0, i], XC[1, i], XC[2, i], S1, S2, GAMS, 0, len(GAMS),
+                                  RCUT, LCUT, FOURPI, DELTA2)
+        Vncw[i] = u * NC[0, i] + v * NC[1, i] + w * NC[2, i]
+
+    return Vncw
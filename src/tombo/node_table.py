@@ -0,0 +1,127 @@
+import numpy as np
+
+def node_table(X, nX, tol=1e-9):
+    """
+    Deduplicate the corners of elements into a table of unique nodes;
+    corners that differ by less than tol (relative to the size of the
+    mesh) are merged. Nodes are numbered in the order of their first
+    corner.
+
+    Parameters
+    ----------
+    X: ndarray[j, n, i]
+        Coordinate j of corner n of element i
+    nX: int
+        Number of elements
+
+    Returns
+    -------
+    conn: ndarray[n, i]
+        Index of the node at corner n of element i
+    first: ndarray[iN]
+        Index of a corner of each node into the flattened corners
+        X[:, :4, :nX].reshape(3, -1)
+    """
+    P = X[:, :4, :nX].reshape(3, 4 * nX)
+    tol = tol * max(np.max(np.abs(P)), 1.0)
+
+    # Corners in the same cell of a grid of spacing tol are merged, on two
+    # grids offset by half a cell, so that corners that differ by round-off
+    # but straddle a cell boundary of one grid are still merged by the other;
+    # each corner is labeled with the first corner of its group
+    label = np.arange(4 * nX)
+    cells = [group_index(np.floor(P / tol)), group_index(np.floor(P / tol + 0.5))]
+    while True:
+        old = label
+        for cell in cells:
+            low = np.full(cell.max() + 1, 4 * nX)
+            np.minimum.at(low, cell, label)
+            label = low[cell]
+        if np.array_equal(label, old):
+            break
+
+    first = np.unique(label)
+    conn = np.searchsorted(first, label)
+
+    return conn.reshape(4, nX), first
+
+def sub_table(conn, nX):
+    """
+    Node table of the first nX elements from the node table of all of
+    them, without deduplicating their corners again; the same as
+    `node_table()` of the first nX elements
+
+    Returns
+    -------
+    conn_s: ndarray[n, i]
+        Index of the node at corner n of element i < nX
+    first: ndarray[iN]
+        As in `node_table()`, for the corners of the first nX elements
+    """
+    label = conn[:, :nX].ravel()
+    nodes, k = np.unique(label, return_index=True)
+
+    # Renumber the nodes in the order of their first corner
+    order = np.argsort(k)
+    rank = np.empty(len(nodes), dtype=np.int64)
+    rank[order] = np.arange(len(nodes))
+
+    return rank[np.searchsorted(nodes, label)].reshape(4, nX), k[order]
+
+def wake_table(conn, nnode, nrow):
+    """
+    Connectivity of a wake made of nrow rows of shed elements, each with
+    the connectivity conn and nnode nodes of the elements they were shed
+    from; row s uses nodes s * nnode to (s + 1) * nnode
+
+    Returns
+    -------
+    conn_w: ndarray[n, iXw]
+        Index of the node at corner n of wake element iXw
+    """
+    nX = conn.shape[1]
+    offset = nnode * np.arange(nrow)
+    return (conn[:, np.newaxis, :] + offset[:, np.newaxis]).reshape(4, nrow * nX)
+
+def to_nodes(X, first):
+    """
+    Values at the nodes from values at the corners of elements
+
+    Parameters
+    ----------
+    X: ndarray[j, n, i, ...]
+        Values at corner n of element i
+    first: ndarray[iN]
+        Corner of each node, from `node_table()`
+
+    Returns
+    -------
+    N: ndarray[j, iN, ...]
+        Values at the nodes
+    """
+    nX = X.shape[2]
+    return X[:, :4].reshape(X.shape[0], 4 * nX, *X.shape[3:])[:, first]
+
+def to_corners(N, conn):
+    """
+    Values at the corners of elements from values at the nodes
+
+    Parameters
+    ----------
+    N: ndarray[j, iN, ...]
+        Values at the nodes
+    conn: ndarray[n, i]
+        Node at corner n of element i, from `node_table()`
+
+    Returns
+    -------
+    X: ndarray[j, n, i, ...]
+        Values at corner n of element i
+    """
+    return N[:, conn]
+
+
+# Helper functions
+def group_index(Q):
+    """Index of the unique column of Q[j, k] of each column k"""
+    return np.unique(Q, axis=1, return_inverse=True)[1].ravel()
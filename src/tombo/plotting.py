@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 from multiprocessing import Pool
 from pathlib import Path
 
@@ -8,9 +9,25 @@ import shutil
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
+from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
 import tombo.globals as g
 
+# Minimum number of data files of a plot type to hand it to the worker pool
+MIN_PARALLEL = 10
+
+# Persistent pool of plotting workers, created on first use
+_pool = None
+# Figure and axes of each plot type, reused from plot to plot when saving
+_figures = {}
+# Time the first plot of each type was submitted while the simulation runs
+# (simplot) and the pending plots of that type; None when plots are generated
+# from saved data files instead
+_live_plots = None
+_live_all = False
+
 def plot_mesh_2D(Xb, nXb, Xc, nXc, npoly=4, *, filename, save):
     """
     Plot 2D view of wing mesh
@@ -33,7 +50,7 @@ def plot_mesh_2D(Xb, nXb, Xc, nXc, npoly=4, *, filename, save):
         If `True`, save plot as a png.
         If `False`, open plot in interactive viewer.
     """
-    fig, ax = plt.subplots()
+    fig, ax = get_axes('mesh2d', save)
 
     plot_mesh_2D_helper(ax, Xb, nXb, npoly, color='r')
     plot_mesh_2D_helper(ax, Xc, nXc, npoly, color='b')
@@ -41,25 +58,17 @@ def plot_mesh_2D(Xb, nXb, Xc, nXc, npoly=4, *, filename, save):
 
     if save:
         fig.savefig(f'{g.plot_folder}/mesh2d/{filename}.png')
-        plt.close(fig)
     else:
         plt.show()
 
 def plot_mesh_2D_helper(ax, X, nX, npoly, color):
-    for i in range(nX):
-        x = np.zeros(npoly + 1)
-        y = np.zeros(npoly + 1)
-
-        x[:npoly] = X[0, :npoly, i]
-        y[:npoly] = X[1, :npoly, i]
-        x[npoly] = X[0, 0, i]
-        y[npoly] = X[1, 0, i]
+    # Closed outline of every element, drawn as a single collection
+    index = [*range(npoly), 0]
+    outlines = X[:2, index, :nX].transpose(2, 1, 0)
+    ax.add_collection(LineCollection(outlines, colors=color, linewidths=2))
 
-        cx = X[0, npoly, i]
-        cy = X[1, npoly, i]
-
-        ax.plot(x, y, color, linewidth=2)
-        ax.plot(cx, cy, 'o')
+    # Centers of the elements
+    ax.plot(X[0, npoly, :nX], X[1, npoly, :nX], 'o')
 
 def plot_mesh_3D(Xb, nXb, Nb, Xc, nXc, Nc, *, filename, save):
     """
@@ -85,8 +94,7 @@ def plot_mesh_3D(Xb, nXb, Nb, Xc, nXc, Nc, *, filename, save):
         If `True`, save plot as a png.
         If `False`, open plot in interactive viewer.
     """
-    fig = plt.figure()
-    ax = fig.add_subplot(projection='3d')
+    fig, ax = get_axes('mesh3d', save, projection='3d')
 
     plot_mesh_3D_helper(ax, Xb, nXb, Nb)
     plot_mesh_3D_helper(ax, Xc, nXc, Nc)
@@ -94,31 +102,19 @@ def plot_mesh_3D(Xb, nXb, Nb, Xc, nXc, Nc, *, filename, save):
 
     if save:
         fig.savefig(f'{g.plot_folder}/mesh3d/{filename}.png')
-        plt.close()
     else:
         plt.show()
 
 def plot_mesh_3D_helper(ax, X, nX, N):
     scale = 0.1
-    Nline = np.zeros((2, 3))
-    x = np.zeros(5)
-    y = np.zeros(5)
-    z = np.zeros(5)
-
-    for i in range(nX):
-        x[:4] = X[0, :4, i]
-        y[:4] = X[1, :4, i]
-        z[:4] = X[2, :4, i]
-        
-        x[4] = X[0, 0, i]
-        y[4] = X[1, 0, i]
-        z[4] = X[2, 0, i]
-
-        ax.plot(x, y, z, 'k')
-        
-        Nline = np.array([X[:, 4, i], X[:, 4, i] + scale * N[:, i]])
-
-        ax.plot(Nline[:, 0], Nline[:, 1], Nline[:, 2], color='r') 
+
+    # Closed outline of every element, drawn as a single collection
+    outlines = element_outlines(X, nX)
+    add_lines_3D(ax, outlines, color='k')
+
+    # Unit normals at the centers of the elements
+    normals = np.stack((X[:, 4, :nX], X[:, 4, :nX] + scale * N[:, :nX]), axis=1)
+    add_lines_3D(ax, normals.transpose(2, 1, 0), color='r')
 
 def plot_airfoil_vel(Vnc, XC, NC, *, filename, save):
     """
@@ -138,16 +134,14 @@ def plot_airfoil_vel(Vnc, XC, NC, *, filename, save):
         If `True`, save plot as a png.
         If `False`, open plot in interactive viewer.
     """
-    fig = plt.figure()
-    ax = fig.add_subplot(projection='3d')
+    fig, ax = get_axes('airfoil_vel', save, projection='3d')
     
     scale_factor = 0.1
     plot_velocity(ax, scale_factor, Vnc, XC, NC)
     ax.set_title('Normal velocity vectors at collocation points')
 
     if save:
-        plt.savefig(f'{g.plot_folder}/airfoil_vel/{filename}.png')
-        plt.close(fig)
+        fig.savefig(f'{g.plot_folder}/airfoil_vel/{filename}.png')
     else:
         plt.show()
 
@@ -169,16 +163,14 @@ def plot_GAMA(GAMA, XC, NC, *, filename, save):
         If `True`, save plot as a png.
         If `False`, open plot in interactive viewer.
     """
-    fig = plt.figure()
-    ax = fig.add_subplot(projection='3d')
+    fig, ax = get_axes('GAMA', save, projection='3d')
     
     scale_factor = 1.0
     plot_velocity(ax, scale_factor, GAMA, XC, NC)
     ax.set_title('GAMA at collocation points')
 
     if save:
-        plt.savefig(f'{g.plot_folder}/GAMA/{filename}.png')
-        plt.close(fig)
+        fig.savefig(f'{g.plot_folder}/GAMA/{filename}.png')
     else:
         plt.show()
 
@@ -232,9 +224,8 @@ def plot_wake(nXb_f, nXw_f, Xb_f, Xw_f, nXb_r, nXw_r, Xb_r, Xw_r, *, filename, s
         If `True`, save plot as a png.
         If `False`, open plot in interactive viewer.
     """
-    fig = plt.figure()
-    
-    ax = fig.add_subplot(projection='3d') #setting axes to 3d # ithink we can limit axies and effectively zoom in
+    fig, ax = get_axes('wake', save, projection='3d')
+    # ithink we can limit axies and effectively zoom in
     ax.set_ylim(0,.01) 
     ax.set_zlim(0,.01)
     
@@ -245,33 +236,40 @@ def plot_wake(nXb_f, nXw_f, Xb_f, Xw_f, nXb_r, nXw_r, Xb_r, Xw_r, *, filename, s
     ax.axis('equal')
 
     if save:      
-        plt.savefig(f'{g.plot_folder}/wake/{filename}.png')
-        plt.close(fig)
+        fig.savefig(f'{g.plot_folder}/wake/{filename}.png')
     else:
         plt.show()
 
 def plot_wing_set(ax, nXb, nXw, Xb, Xw):
     """Helper for `plot_wake`"""
     # Original border elements
-    for w in range(g.nwing):
-        for i in range(nXb):
-            x = [Xb[0,0,i,w], Xb[0,1,i,w], Xb[0,2,i,w], Xb[0,3,i,w], Xb[0,0,i,w]]
-            y = [Xb[1,0,i,w], Xb[1,1,i,w], Xb[1,2,i,w], Xb[1,3,i,w], Xb[1,0,i,w]]
-            z = [Xb[2,0,i,w], Xb[2,1,i,w], Xb[2,2,i,w], Xb[2,3,i,w], Xb[2,0,i,w]]
-
-            ax.plot(x, y, z, 'r')
+    outlines = [element_outlines(Xb[..., w], nXb) for w in range(g.nwing)]
+    add_lines_3D(ax, np.concatenate(outlines), color='r')
     
     # Wake elements
     for w in range(g.nwing):
-        for i in range(nXw):
-            x = [Xw[0,0,i,w], Xw[0,1,i,w], Xw[0,2,i,w], Xw[0,3,i,w], Xw[0,0,i,w]]
-            y = [Xw[1,0,i,w], Xw[1,1,i,w], Xw[1,2,i,w], Xw[1,3,i,w], Xw[1,0,i,w]]
-            z = [Xw[2,0,i,w], Xw[2,1,i,w], Xw[2,2,i,w], Xw[2,3,i,w], Xw[2,0,i,w]]
+        add_lines_3D(ax, element_outlines(Xw[..., w], nXw),
+                     color='k' if w == 0 else 'b')
+
+def element_outlines(X, nX):
+    """
+    Closed outlines of the quadrilateral elements X[j, n, i]
+    as polylines[i, n, j] for use in a line collection
+    """
+    return X[:, [0, 1, 2, 3, 0], :nX].transpose(2, 1, 0)
+
+def add_lines_3D(ax, lines, color):
+    """
+    Draw lines[i, n, j] as a single `Line3DCollection` and
+    extend the data limits of `ax` to include them
+    """
+    if len(lines) == 0:
+        return
+
+    ax.add_collection3d(Line3DCollection(lines, colors=color))
 
-            if w == 0:
-                ax.plot(x, y, z, 'k')
-            else:
-                ax.plot(x, y, z, 'b')
+    points = lines.reshape(-1, 3)
+    ax.auto_scale_xyz(points[:, 0], points[:, 1], points[:, 2], had_data=True)
 
 def plot_force(times, force, *, filename, save):
     """
@@ -284,13 +282,12 @@ def plot_force(times, force, *, filename, save):
     force: ndarray
         Force on the wings at each corresponding point in time    
     """
-    fig = plt.figure()
-    plt.plot(times, force, 'x-k')
-    plt.grid(True)
+    fig, ax = get_axes('force', save)
+    ax.plot(times, force, 'x-k')
+    ax.grid(True)
 
     if save:
-        plt.savefig(f'{g.plot_folder}/force/{filename}.png')
-        plt.close(fig)
+        fig.savefig(f'{g.plot_folder}/force/{filename}.png')
     else:
         plt.show()
 
@@ -305,16 +302,36 @@ def plot_moment(times, moment, *, filename, save):
     moment: ndarray
         Moment on the wings at each corresponding point in time    
     """
-    fig = plt.figure()
-    plt.plot(times, moment, 'o-r')
-    plt.grid(True)
+    fig, ax = get_axes('moment', save)
+    ax.plot(times, moment, 'o-r')
+    ax.grid(True)
 
     if save:
-        plt.savefig(f'{g.plot_folder}/moment/{filename}.png')
-        plt.close(fig)
+        fig.savefig(f'{g.plot_folder}/moment/{filename}.png')
     else:
         plt.show()
 
+def get_axes(plot_type, save, projection=None):
+    """
+    Get a figure and empty axes for a plot of type `plot_type`
+
+    When saving, the figure is created once per process and plot type and
+    its axes are cleared for each subsequent plot, instead of building and
+    tearing down a new figure for every data file.
+    """
+    if not save:
+        fig = plt.figure()
+        return fig, fig.add_subplot(projection=projection)
+
+    if plot_type not in _figures:
+        fig = plt.figure()
+        _figures[plot_type] = fig, fig.add_subplot(projection=projection)
+
+    fig, ax = _figures[plot_type]
+    ax.cla()
+
+    return fig, ax
+
 # Relate each plot type to its corresponding function
 plotting_funcs = {
     'mesh2d': plot_mesh_2D,
@@ -343,19 +360,201 @@ def make_plot(full_path, save=True):
     plot_type = path.parts[-2]
 
     with np.load(full_path) as data:
-        plotting_funcs[plot_type](*data.values(),
-                                  filename=path.stem,
-                                  save=save)
+        plot_data(plot_type, path.stem, data, save)
+
+def plot_data(plot_type, stem, data, save=True):
+    """
+    Generate plot of type `plot_type` from a mapping of its data arrays
+
+    Returns
+    -------
+    elapsed: float
+        Time spent generating the plot in seconds
+    """
+    start_time = time.time()
+    plotting_funcs[plot_type](*data.values(), filename=stem, save=save)
+
+    return time.time() - start_time
+
+def save_plot_data(plot_type, stem, **data):
+    """
+    Hand the data for a plot of type `plot_type` to the plotting pipeline
+
+    The data is written to `{data_folder}/{plot_type}/{stem}.npz` if
+    `save_data` is enabled. While live plotting is active (see
+    `start_live_plots()`), the plot is also submitted directly to the
+    plotting workers, skipping the round trip through the data file.
+    """
+    if g.save_data:
+        np.savez(f'{g.data_folder}/{plot_type}/{stem}', **data)
+
+    if _live_plots is not None and (_live_all or g.plot_enabled[plot_type]):
+        # Copy the arrays, since the simulation updates some of them in place
+        data = {key: np.array(value) for key, value in data.items()}
+        result = get_pool().apply_async(live_plot, (plot_type, stem, data))
+        _live_plots.setdefault(plot_type, (time.time(), []))[1].append(result)
+
+def start_live_plots(all):
+    """
+    Generate plots from the data handed to `save_plot_data()` as the
+    simulation produces it, instead of from saved data files
+
+    Parameters
+    ----------
+    all: bool
+        If `True`, ignore `plot_enabled` and generate all plots
+    """
+    global _live_plots, _live_all
+
+    _live_plots = {}
+    _live_all = all
+    get_pool()
+
+def finish_live_plots():
+    """Wait for the plots submitted during the simulation to be generated"""
+    global _live_plots
+
+    # Wall time from the first plot of each type handed to the workers
+    # to the last one finished (the plots of different types overlap)
+    for plot_type, (start_time, results) in _live_plots.items():
+        elapsed = max(result.get() for result in results) - start_time
+        print(f"{plot_type}: {len(results)} plots in {elapsed:.2f} s")
+
+    _live_plots = None
+
+def live_plot(plot_type, stem, data):
+    """`plot_data()` in a plotting worker; returns the (wall clock) time it finished"""
+    plot_data(plot_type, stem, data)
+
+    return time.time()
 
 def view_plot(path):
     """Generate single plot in interactive viewer"""
     make_plot(path, save=False)
 
-def generate_plots(dir, all, chunksize=10):
-            
-    """Generate and save plot for each data file in dir"""
-    # Construct list of all data files in directory
-    data_files = []
+def animate_wake(dir, filename, fps=10):
+    """
+    Animate the evolution of the wake into a single video or GIF
+
+    One figure is set up with a line collection per element group, and
+    the segments of those collections are replaced in place for each
+    frame. Frames are read from the `wake_{istep}` data files in dir one
+    at a time, so no per-frame images are written.
+
+    Parameters
+    ----------
+    dir: str
+        Folder containing the wake data files
+    filename: str
+        Path of the animation; a `.gif` extension is written with Pillow,
+        anything else (e.g. `.mp4`) with ffmpeg
+    fps: int
+        Frames per second
+    """
+    files = sorted(Path(dir).glob('wake_*.npz'),
+                   key=lambda path: int(path.stem.split('_')[-1]))
+    if not files:
+        raise ValueError(f"no wake data files in {dir}")
+
+    fig = plt.figure()
+    ax = fig.add_subplot(projection='3d')
+
+    # Fixed axis limits that contain the elements of every frame; the wake
+    # grows, but it also moves, so no single frame bounds all of them
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for path in files:
+        with np.load(path) as data:
+            border, wake = wake_outlines(data)
+        points = np.concatenate([border, *wake]).reshape(-1, 3)
+        lo = np.minimum(lo, points.min(axis=0))
+        hi = np.maximum(hi, points.max(axis=0))
+
+    # Set up the collections with a point-sized dummy segment each, since the
+    # wake may be empty (it is in the first frame) and empty collections
+    # cannot be added to a 3D axes; the frames replace the segments
+    colors = ['r'] + ['k' if w == 0 else 'b' for w in range(len(wake))]
+    collections = []
+    for color in colors:
+        collections.append(Line3DCollection(np.full((1, 2, 3), lo), colors=color))
+        ax.add_collection3d(collections[-1])
+
+    ax.set_xlim(lo[0], hi[0])
+    ax.set_ylim(lo[1], hi[1])
+    ax.set_zlim(lo[2], hi[2])
+    ax.axis('equal')
+
+    def update(path):
+        with np.load(path) as data:
+            border, wake = wake_outlines(data)
+
+        for collection, lines in zip(collections, [border, *wake]):
+            collection.set_segments(lines)
+        ax.set_title(path.stem)
+
+        return collections
+
+    animation = FuncAnimation(fig, update, frames=files, cache_frame_data=False)
+    writer = 'pillow' if Path(filename).suffix == '.gif' else 'ffmpeg'
+    animation.save(filename, writer=writer, fps=fps)
+    plt.close(fig)
+
+def wake_outlines(data):
+    """
+    Outlines of the border elements of all wings, and of the wake
+    elements of each wing w (front and rear combined), from wake data;
+    the number of wings is that of the data, not of the current config
+    """
+    nwing = data['Xb_f'].shape[-1]
+    border = [element_outlines(data[f'Xb_{m}'][..., w], data[f'nXb_{m}'])
+              for m in ['f', 'r'] for w in range(nwing)]
+    wake = [np.concatenate([element_outlines(data[f'Xw_{m}'][..., w], data[f'nXw_{m}'])
+                            for m in ['f', 'r']])
+            for w in range(nwing)]
+
+    return np.concatenate(border), wake
+
+def init_worker():
+    """Set up a plotting worker to render with the non-interactive Agg backend"""
+    _figures.clear()
+    plt.close('all')
+    matplotlib.use('Agg')
+
+def get_pool():
+    """Get the pool of plotting workers, starting it on first use"""
+    global _pool
+
+    if _pool is None:
+        _pool = Pool(initializer=init_worker)
+
+    return _pool
+
+def close_pool(terminate=False):
+    """
+    Wait for the plotting workers to finish and shut them down; with
+    `terminate`, stop them at once and drop the pending plots
+    """
+    global _pool
+
+    if _pool is not None:
+        if terminate:
+            _pool.terminate()
+        else:
+            _pool.close()
+        _pool.join()
+        _pool = None
+
+def generate_plots(dir, all, chunksize=None):
+    """
+    Generate and save plot for each data file in dir
+
+    The data files are partitioned by plot type, and each plot type is
+    rendered in turn by the persistent worker pool so that every worker
+    keeps reusing the same figure. `chunksize` is passed to `Pool.map`;
+    by default it is derived from the number of files and workers.
+    """
+    # Construct list of all data files in directory for each plot type
+    data_files = {}
     
     for root, _, files in os.walk(dir):
         for file in files:
@@ -363,31 +562,29 @@ def generate_plots(dir, all, chunksize=10):
             path = Path(full_path)
             plot_type = path.parts[-2]
             
-            if all:
-                data_files.append(full_path)
-            elif g.plot_enabled[plot_type]:
-                data_files.append(full_path)
+            if all or g.plot_enabled[plot_type]:
+                data_files.setdefault(plot_type, []).append(full_path)
     
     # Create plots
-    if len(data_files) < chunksize:
-        # Force map to make calls with empty loop
-        for _ in map(make_plot, data_files):
-            pass
-    else:
-        with Pool() as pool:
-            # Force imap_unordered to make calls with empty loop
-            for _ in pool.imap_unordered(make_plot, data_files, chunksize=chunksize):
-                pass
+    for plot_type, files in data_files.items():
+        start_time = time.time()
 
-def main(path):
-    CHUNKSIZE = 10
+        if len(files) < MIN_PARALLEL:
+            for file in files:
+                make_plot(file)
+        else:
+            get_pool().map(make_plot, files, chunksize=chunksize)
 
+        print(f"{plot_type}: {len(files)} plots in {time.time() - start_time:.2f} s")
+
+def main(path):
     create_directories(g.plot_folder)
 
     if os.path.isfile(path):
         view_plot(path)
     elif os.path.isdir(path):
         generate_plots(path, all=False)
+        close_pool()
     else:
         raise ValueError("argument must be path to a directory or a file")
 
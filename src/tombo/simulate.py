@@ -4,34 +4,56 @@ from shutil import copyfile
 import tombo.globals as g
 from tombo.plotting import create_directories
 from tombo.plotting import delete_directories
-from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh
+from tombo.plotting import save_plot_data
 from tombo.nd_data import nd_data
 from tombo.wing_total import wing_total
-from tombo.lr_set_matrix import lr_set_matrix
-from tombo.wing_m import wing_m
-from tombo.lr_mass_L2GT import lr_mass_L2GT
-from tombo.lrs_wing_NVs import lrs_wing_NVs
-from tombo.n_vel_T_by_W import n_vel_T_by_W
+from tombo.geometry_cache import cached_mesh, cached_self_matrix, identical_wings
+from tombo.symmetric_5_sided_mesh import save_mesh_plot_data
+from tombo.wing_m import wing_m, kinematics_table
+from tombo.lr_mass_L2GT import wings_nodes_L2GT
+from tombo.lrs_wing_NVs import wings_NVs
+from tombo.n_vel_T_by_W import n_vel_T_by_segments
 from tombo.cross_matrix import cross_matrix
 from tombo.assemble_matrix import assemble_matrix
 from tombo.solution import solution
 from tombo.s_impulse_WT import s_impulse_WT
 from tombo.b_vel_B_by_T_matrix import b_vel_B_by_T_matrix
 from tombo.vel_B_by_T import vel_B_by_T
-from tombo.cross_vel_B_by_T import cross_vel_B_by_T
+from tombo.cross_vel_B_by_T import cross_vel_B_by_segments
 from tombo.assemble_vel_B_by_T import assemble_vel_B_by_T
 from tombo.add_wake import add_wake
-from tombo.force_moment import force_moment
-from tombo.vel_by import vel_by
+from tombo.convect_wake import convect_wake
+from tombo.adaptive_dt import adaptive_dt
+from tombo.force_moment import force_moment, force_moment_step, stream_force_moment, close_stream
+from tombo.force_moment import resample_impulse
+from tombo.node_table import node_table, sub_table, wake_table, to_nodes, to_corners
+from tombo.element_segments import element_segments
+from tombo.vel_batch import vel_batch_groups
+from tombo.source_segments import segment_table, wake_segment_table
+from tombo.source_segments import source_segments, concat_segments
+from tombo.timers import timer, set_step
 
 
 def simulate():
     # SETUP
     # -----
-    xb_f, nxb_f, nb_f, xc_f, nxc_f, nc_f, l_f, c_f, h_f = \
-        symmetric_5_sided_mesh('f', g.lt_f, g.lr_f, g.bang_f, g.hfactor_f, g.wfactor_f)
-    xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r, l_r, c_r, h_r = \
-        symmetric_5_sided_mesh('r', g.lt_r, g.lr_r, g.bang_r, g.hfactor_r, g.wfactor_r)
+    # Front and rear wings of the same shape share the mesh and everything
+    # built from it in the setup (node and segment tables, self-influence
+    # matrices); these arrays are only read in the time march
+    same_shape = identical_wings()
+
+    set_step(-1)
+
+    with timer('mesh'):
+        xb_f, nxb_f, nb_f, xc_f, nxc_f, nc_f, l_f, c_f, h_f = \
+            cached_mesh('f', g.lt_f, g.lr_f, g.bang_f, g.hfactor_f, g.wfactor_f)
+        if same_shape:
+            xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r, l_r, c_r, h_r = \
+                xb_f, nxb_f, nb_f, xc_f, nxc_f, nc_f, l_f, c_f, h_f
+            save_mesh_plot_data('r', xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r)
+        else:
+            xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r, l_r, c_r, h_r = \
+                cached_mesh('r', g.lt_r, g.lr_r, g.bang_r, g.hfactor_r, g.wfactor_r)
     
     if g.b_r - g.b_f >= 0.5 * (c_r + c_f):
         print("wing clearance checked")
@@ -48,12 +70,73 @@ def simulate():
     # within this distance from the vortex line and/or its extension are set to zero
     LCUT = 0.1 * h[0]
 
+    # Precision of the induced velocity kernels (the linear system is always
+    # solved in float64); their inputs, including the constants, are
+    # converted so that nothing promotes the calculation back to float64
+    ftype = np.float32 if g.precision == 'mixed' else np.float64
+    # Smoothed core model: DELTA2 sets the core radius (see vortex_segments_smooth())
+    DELTA2 = 0.5 * (g.core_radius * LCUT)**2 if g.core == 'smooth' else 0.0
+    K = (ftype(g.RCUT), ftype(LCUT), ftype(4.0 * np.pi), ftype(DELTA2))
+
+    # End time of the time march, the number of steps to allocate for and
+    # the largest number of steps; in adaptive mode the end time is reached
+    # in a variable number of steps, and the step-sized arrays are grown
+    # when the steps run out (rather than sized for all steps of dt_min)
+    t_end = (g.nstep - 1) * g.dt
+    nstep = g.nstep
+    if g.adaptive:
+        nstep_max = int(np.ceil(t_end / g.dt_min)) + 3
+    else:
+        nstep_max = nstep
+
     # Front right wing
     xc_f, xb_f, xt_f, nxt_f, xC_f, nC_f = \
         wing_total(xb_f, nxb_f, nb_f, xc_f, nxc_f, nc_f)
     # Rear right wing
-    xc_r, xb_r, xt_r, nxt_r, xC_r, nC_r = \
-        wing_total(xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r)
+    if same_shape:
+        xc_r, xb_r, xt_r, nxt_r, xC_r, nC_r = xc_f, xb_f, xt_f, nxt_f, xC_f, nC_f
+    else:
+        xc_r, xb_r, xt_r, nxt_r, xC_r, nC_r = \
+            wing_total(xb_r, nxb_r, nb_r, xc_r, nxc_r, nc_r)
+
+    with timer('tables'):
+        # Unique nodes of the total elements; the corners are deduplicated once
+        # per wing shape, and the tables of the border elements (the first nxb
+        # of the total elements) are taken from them
+        connt_f, firstt_f = node_table(xt_f, nxt_f)
+        connt_r, firstt_r = (connt_f, firstt_f) if same_shape else node_table(xt_r, nxt_r)
+
+        # Unique nodes of the border elements; neighboring border elements share
+        # corners, so the wake is tracked and convected as a table of nodes, with
+        # one row of nnb nodes shed per step, and its elements are rebuilt from them
+        conn_f, first_f = sub_table(connt_f, nxb_f)
+        conn_r, first_r = (conn_f, first_f) if same_shape else sub_table(connt_r, nxb_r)
+        nnb_f = len(first_f)
+        nnb_r = len(first_r)
+        connw_f = wake_table(conn_f, nnb_f, nstep)
+        connw_r = connw_f if same_shape else wake_table(conn_r, nnb_r, nstep)
+
+        # Indexed wing mesh: the unique nodes of the total elements are transformed
+        # each step and the corners of the total and border elements (the first
+        # nxb of the total elements) are gathered from them
+        xn_f = to_nodes(xt_f, firstt_f)
+        xn_r = to_nodes(xt_r, firstt_r)
+        connb_f = np.ascontiguousarray(connt_f[:, :nxb_f])
+        connb_r = np.ascontiguousarray(connt_r[:, :nxb_r])
+
+        # Vortex line segments of the wings and wakes; an edge shared by two
+        # elements is a single segment carrying the difference of their circulations
+        edgest_f, segt_f, signt_f = segment_table(connt_f)
+        edgest_r, segt_r, signt_r = \
+            (edgest_f, segt_f, signt_f) if same_shape else segment_table(connt_r)
+        nst_f = edgest_f.shape[1]
+        nst_r = edgest_r.shape[1]
+        # Segments of one row of shed elements
+        nsb_f = segment_table(conn_f)[0].shape[1]
+        nsb_r = segment_table(conn_r)[0].shape[1]
+        edgesw_f, segw_f, signw_f = wake_segment_table(*segment_table(conn_f), nnb_f, nstep)
+        edgesw_r, segw_r, signw_r = (edgesw_f, segw_f, signw_f) if same_shape else \
+            wake_segment_table(*segment_table(conn_r), nnb_r, nstep)
 
     # Wake vortex magnitude array
     GAMw_f = np.zeros((g.nwing, nxb_f))
@@ -62,22 +145,26 @@ def simulate():
     nxw_f = 0
     nxw_r = 0
     # Wake vortex location array (after convection)
-    Xw_f = np.zeros((3, 4, nxb_f * g.nstep, g.nwing))
-    Xw_r = np.zeros((3, 4, nxb_r * g.nstep, g.nwing))
-    # Shed vortex location array 
-    Xs_f = np.zeros((3, 4, nxb_f, g.nwing))
-    Xs_r = np.zeros((3, 4, nxb_r, g.nwing))
+    Xw_f = np.zeros((3, 4, nxb_f * nstep, g.nwing))
+    Xw_r = np.zeros((3, 4, nxb_r * nstep, g.nwing))
+    # Wake node location array and total wake node number
+    Nw_f = np.zeros((3, nnb_f * nstep, g.nwing))
+    Nw_r = np.zeros((3, nnb_r * nstep, g.nwing))
+    nnw_f = 0
+    nnw_r = 0
 
     if g.nstep > 3:
         # Initialize the linear and angular impulse arrays
-        limpa_f = np.zeros((3, g.nstep, g.nwing))
-        limpa_r = np.zeros((3, g.nstep, g.nwing))
-        aimpa_f = np.zeros((3, g.nstep, g.nwing))
-        aimpa_r = np.zeros((3, g.nstep, g.nwing))
-        limpw_f = np.zeros((3, g.nstep, g.nwing))
-        limpw_r = np.zeros((3, g.nstep, g.nwing))
-        aimpw_f = np.zeros((3, g.nstep, g.nwing))
-        aimpw_r = np.zeros((3, g.nstep, g.nwing))
+        limpa_f = np.zeros((3, nstep, g.nwing))
+        limpa_r = np.zeros((3, nstep, g.nwing))
+        aimpa_f = np.zeros((3, nstep, g.nwing))
+        aimpa_r = np.zeros((3, nstep, g.nwing))
+        limpw_f = np.zeros((3, nstep, g.nwing))
+        limpw_r = np.zeros((3, nstep, g.nwing))
+        aimpw_f = np.zeros((3, nstep, g.nwing))
+        aimpw_r = np.zeros((3, nstep, g.nwing))
+    # Times of the impulses (shifted by dt, as in force_moment())
+    times = np.zeros(nstep)
 
     # Normal velocity on the wing due to the wing motion & wake vortices
     Vnc_f = np.zeros((g.nwing, nxt_f))
@@ -90,22 +177,25 @@ def simulate():
     MVNs_r = np.zeros((nxt_r, nxt_r, g.nwing))
 
     # Velocity value matrices
-    VBW_f = np.zeros((3, 4, nxb_f, g.nwing))
-    VBW_r = np.zeros((3, 4, nxb_r, g.nwing))
-    VWT_f = np.zeros((3, 4, nxb_f * g.nstep, g.nwing))
-    VWT_r = np.zeros((3, 4, nxb_r * g.nstep, g.nwing))
-    VWW_f = np.zeros((3, 4, nxb_f * g.nstep, g.nwing))
-    VWW_r = np.zeros((3, 4, nxb_r * g.nstep, g.nwing))
-
-    # TODO: Document Xc_f/r
-    Xc_f = np.zeros((3, 4, nxc_f, 2))
-    Xc_r = np.zeros((3, 4, nxc_r, 2))
-    # Space-fixed system coords of border elements on the wing
-    Xb_f = np.zeros((3, 4, nxb_f, 2))
-    Xb_r = np.zeros((3, 4, nxb_r, 2))
-    # Global coords of total elements on the wing
-    Xt_f = np.zeros((3, 4, nxt_f, 2))
-    Xt_r = np.zeros((3, 4, nxt_r, 2))
+    # (at the border and wake nodes)
+    VBW_f = np.zeros((3, nnb_f, g.nwing))
+    VBW_r = np.zeros((3, nnb_r, g.nwing))
+    VWT_f = np.zeros((3, nnb_f * nstep, g.nwing))
+    VWT_r = np.zeros((3, nnb_r * nstep, g.nwing))
+    VWW_f = np.zeros((3, nnb_f * nstep, g.nwing))
+    VWW_r = np.zeros((3, nnb_r * nstep, g.nwing))
+    # Wake velocities of the previous step and the number of wake nodes
+    # they were evaluated for (used by multistep convection schemes)
+    VW_f_old = np.zeros((3, nnb_f * nstep, g.nwing))
+    VW_r_old = np.zeros((3, nnb_r * nstep, g.nwing))
+    nnw_f_old = 0
+    nnw_r_old = 0
+
+    # Offsets of the front and rear pair
+    b = np.array([b_f, b_r])
+    # Global coords of the nodes of the total elements on the wing
+    Nt_f = np.zeros((3, len(firstt_f), 2))
+    Nt_r = np.zeros((3, len(firstt_r), 2))
     # Global coords of the collocation points on the wing
     XC_f = np.zeros((3, nxt_f, 2))
     XC_r = np.zeros((3, nxt_r, 2))
@@ -115,210 +205,340 @@ def simulate():
 
     # TIME MARCH
     # ----------
-    MVNs_f = lr_set_matrix(xt_f, nxt_f, xC_f, nC_f, g.RCUT)
-    MVNs_r = lr_set_matrix(xt_r, nxt_r, xC_r, nC_r, g.RCUT)
-
-    for istep in range(g.nstep):   
-          
-        t = istep * g.dt
-
-        # Get wing motion parameters
-        phi = np.zeros(g.twing)
-        theta = np.zeros(g.twing)
-        dph = np.zeros(g.twing)
-        dth = np.zeros(g.twing)
-
-        for i in range(g.twing):
-            phi[i], theta[i], dph[i], dth[i] = \
-                wing_m(g.mpath[i], t, rt[i], g.tau[i], e[i],
-                       gMax[i], g.p[i], g.rtOff[i], phiT[i], phiB[i])
-
-        # Get global coordinates of the points on the wing
-        for i in range(g.nwing):
-            # Front wing
-            Xc_f[..., i], Xb_f[..., i], Xt_f[..., i], XC_f[..., i], NC_f[..., i] = \
-                lr_mass_L2GT(i, beta[i], delta, phi[i], theta[i], a[i], U, t, b_f,
-                             xc_f, xb_f, xt_f, xC_f, nC_f)
-            # Rear wing                                                                       
-            Xc_r[..., i], Xb_r[..., i], Xt_r[..., i], XC_r[..., i], NC_r[..., i] = \
-                lr_mass_L2GT(i, beta[i + 2], delta, phi[i + 2], theta[i + 2], a[i + 2], U, t, b_r,
-                             xc_r, xb_r, xt_r, xC_r, nC_r)
-
-        # Find velocity of the wing
-        for i in range(g.nwing):
-            # Front wing
-            Vnc_f[i, :] = lrs_wing_NVs(0, i, xC_f, XC_f[:, :, i], NC_f[:, :, i], t, theta[i],
-                                       phi[i], dph[i], dth[i], a[i], beta[i], U)
-            # Rear wing
-            Vnc_r[i, :] = lrs_wing_NVs(1, i, xC_r, XC_r[:, :, i], NC_r[:, :, i], t, theta[i + 2],
-                                       phi[i + 2], dph[i + 2], dth[i + 2], a[i + 2], beta[i + 2], U)
-
-        # Normal vel on each airfoil by front & rear, right & left wake vortices
-        # For each wing, there are 4 wake vortex contributions
-        for i in range(g.nwing):
-            # Front wing
-            Vncw_f[i, :] = n_vel_T_by_W(istep, nxt_f, XC_f[:, :, i], NC_f[:, :, i],
-                                        Xw_f, GAMw_f, nxw_f, Xw_r, GAMw_r, nxw_r, g.RCUT, LCUT)
-            # Rear wing  
-            Vncw_r[i, :] = n_vel_T_by_W(istep, nxt_r, XC_r[:, :, i], NC_r[:, :, i],
-                                        Xw_f, GAMw_f, nxw_f, Xw_r, GAMw_r, nxw_r, g.RCUT, LCUT)
-
-        # Calculation of the time-dependent sub-matrices MVNs_ij (i~=j)
-        MVNs_12 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Xt_f[..., 1], nxt_f, g.RCUT)
-        MVNs_13 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Xt_r[..., 0], nxt_r, g.RCUT)
-        MVNs_14 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Xt_r[..., 1], nxt_r, g.RCUT)
-        MVNs_21 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Xt_f[..., 0], nxt_f, g.RCUT)
-        MVNs_23 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Xt_r[..., 0], nxt_r, g.RCUT)
-        MVNs_24 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Xt_r[..., 1], nxt_r, g.RCUT)
-        MVNs_31 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Xt_f[..., 0], nxt_f, g.RCUT)
-        MVNs_32 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Xt_f[..., 1], nxt_f, g.RCUT)
-        MVNs_34 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Xt_r[..., 1], nxt_r, g.RCUT)
-        MVNs_41 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Xt_f[..., 0], nxt_f, g.RCUT)
-        MVNs_42 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Xt_f[..., 1], nxt_f, g.RCUT)
-        MVNs_43 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Xt_r[..., 0], nxt_r, g.RCUT)
-
-        # Assemble the total matrix using MVNs_f[:,:,1], MVNs_r[:,:,1], MVNs_ij[:,:]
-        MVN = assemble_matrix(MVNs_f, MVNs_r,
-                              MVNs_12, MVNs_13, MVNs_14,
-                              MVNs_21, MVNs_23, MVNs_24,
-                              MVNs_31, MVNs_32, MVNs_34,
-                              MVNs_41, MVNs_42, MVNs_43)
-
-        # Solve the system of equations
-        GAMA = solution(nxt_f, nxt_r, MVN, Vnc_f, Vncw_f, Vnc_r, Vncw_r)
-
-        # Split GAMA into 4 parts
-        GAM_f = np.zeros((2, nxt_f))
-        GAM_r = np.zeros((2, nxt_r))
-
-        GAM_f[0, 0:nxt_f] = GAMA[0:nxt_f]  # Front right wing
-        GAM_f[1, 0:nxt_f] = GAMA[nxt_f:(2 * nxt_f)]  # Front left  wing
-        GAM_r[0, 0:nxt_r] = GAMA[(2 * nxt_f):(2 * nxt_f + nxt_r)]  # Rear right wing
-        GAM_r[1, 0:nxt_r] = GAMA[(2 * nxt_f + nxt_r):(2 * nxt_f + 2 * nxt_r)]  # Rear left  wing
-
-        # Save data for plotting GAMA
-        if g.save_data:
+    with timer('self_matrix'):
+        MVNs_f = cached_self_matrix(xt_f, nxt_f, xC_f, nC_f, g.RCUT)
+        MVNs_r = MVNs_f if same_shape else cached_self_matrix(xt_r, nxt_r, xC_r, nC_r, g.RCUT)
+
+    # Wing motion parameters of all steps; adaptive steps are evaluated as they are taken
+    if not g.adaptive:
+        kinematics = kinematics_table(g.dt * np.arange(nstep), g.mpath, rt, g.tau, e,
+                                      gMax, g.p, g.rtOff, phiT, phiB)
+
+    t = 0.0
+    dt = dt_old = g.dt
+
+    for istep in range(nstep_max):
+        if istep == nstep:
+            # Out of steps (adaptive mode): double the step-sized arrays
+            nstep = min(2 * nstep, nstep_max)
+            connw_f = wake_table(conn_f, nnb_f, nstep)
+            connw_r = connw_f if same_shape else wake_table(conn_r, nnb_r, nstep)
+            edgesw_f, segw_f, signw_f = wake_segment_table(*segment_table(conn_f), nnb_f, nstep)
+            edgesw_r, segw_r, signw_r = (edgesw_f, segw_f, signw_f) if same_shape else \
+                wake_segment_table(*segment_table(conn_r), nnb_r, nstep)
+            Xw_f = grow(Xw_f, 2, nxb_f * nstep)
+            Xw_r = grow(Xw_r, 2, nxb_r * nstep)
+            Nw_f, VWT_f, VWW_f, VW_f_old = [grow(x, 1, nnb_f * nstep) for x in
+                                            (Nw_f, VWT_f, VWW_f, VW_f_old)]
+            Nw_r, VWT_r, VWW_r, VW_r_old = [grow(x, 1, nnb_r * nstep) for x in
+                                            (Nw_r, VWT_r, VWW_r, VW_r_old)]
+            times = grow(times, 0, nstep)
+            if g.nstep > 3:
+                limpa_f, limpa_r, aimpa_f, aimpa_r, limpw_f, limpw_r, aimpw_f, aimpw_r = \
+                    [grow(x, 1, nstep) for x in (limpa_f, limpa_r, aimpa_f, aimpa_r,
+                                                 limpw_f, limpw_r, aimpw_f, aimpw_r)]
+
+        times[istep] = t + g.dt
+        set_step(istep)
+
+        with timer('geometry'):
+            # Get wing motion parameters
+            if g.adaptive:
+                phi, theta, dph, dth = wing_m(g.mpath, t, rt, g.tau, e, gMax, g.p, g.rtOff, phiT, phiB)
+            else:
+                phi, theta, dph, dth = [x[:, istep] for x in kinematics]
+
+            # Get global coordinates of the points on the front and rear wings
+            wings_nodes_L2GT(beta, delta, phi, theta, a, U, t, b,
+                             xn_f, xC_f, nC_f, Nt_f, XC_f, NC_f,
+                             xn_r, xC_r, nC_r, Nt_r, XC_r, NC_r)
+
+            # Global coords of the total and border elements on the wing
+            Xt_f = to_corners(Nt_f, connt_f)
+            Xt_r = to_corners(Nt_r, connt_r)
+            Xb_f = to_corners(Nt_f, connb_f)
+            Xb_r = to_corners(Nt_r, connb_r)
+
+            # Edges of the total elements, contiguous for each wing
+            Et1_f, Et2_f = element_segments(Xt_f, nxt_f)
+            Et1_r, Et2_r = element_segments(Xt_r, nxt_r)
+
+            # Normal velocity of the wings at the collocation points
+            wings_NVs(xC_f, XC_f, NC_f, xC_r, XC_r, NC_r, t, theta, phi, dph, dth,
+                      a, beta, U, Vnc_f, Vnc_r)
+
+        with timer('wake_on_wing'):
+            # Vortex line segments of the front & rear, right & left wakes
+            nsw_f = nxw_f // nxb_f * nsb_f
+            nsw_r = nxw_r // nxb_r * nsb_r
+            Sw = concat_segments(
+                *[source_segments(Nw_f[..., i], edgesw_f, segw_f, signw_f, GAMw_f[i], nxw_f, nsw_f, ftype)
+                  for i in range(g.nwing)],
+                *[source_segments(Nw_r[..., i], edgesw_r, segw_r, signw_r, GAMw_r[i], nxw_r, nsw_r, ftype)
+                  for i in range(g.nwing)])
+
+            # Normal vel on each airfoil by front & rear, right & left wake vortices
+            XCk_f = XC_f.astype(ftype, copy=False)
+            XCk_r = XC_r.astype(ftype, copy=False)
             for i in range(g.nwing):
-                np.savez(f'{g.data_folder}/GAMA/GAMA_{g.labels[0][i]}_{t:.4f}',
-                            GAMA=GAM_f[i], XC=XC_f[..., i], NC=NC_f[..., i])
-                np.savez(f'{g.data_folder}/GAMA/GAMA_{g.labels[1][i]}_{t:.4f}',
-                            GAMA=GAM_r[i], XC=XC_r[..., i], NC=NC_r[..., i])
-
-            # Save data for plotting wakes
-            np.savez(f'{g.data_folder}/wake/wake_{istep}',
-                        nXb_f=nxb_f, nXw_f=nxw_f, Xb_f=Xb_f, Xw_f=Xw_f,
-                        nXb_r=nxb_r, nXw_r=nxw_r, Xb_r=Xb_r, Xw_r=Xw_r)
-
-        if g.nstep > 3:  # At least 4 steps needed to calculate forces and moments
-            # Calculate impulses in the body-translating system
-            # Include all of the bound vortices and wake vortices
-            # For istep=1, there are no wake vortices
-            # Front wing
-            limpa, aimpa, limpw, aimpw = \
-                s_impulse_WT(istep, U, t, Xt_f, Xw_f, GAM_f, GAMw_f,
-                             beta[0:2], phi[0:2], theta[0:2], a[0:2])
-            for j in range(3):
-                for w in range(g.nwing):
-                    limpa_f[j, istep, w] = limpa[j, w]
-                    aimpa_f[j, istep, w] = aimpa[j, w]
-                    limpw_f[j, istep, w] = limpw[j, w]
-                    aimpw_f[j, istep, w] = aimpw[j, w]
-            # Rear wing
-            limpa, aimpa, limpw, aimpw = \
-                s_impulse_WT(istep, U, t, Xt_r, Xw_r, GAM_r, GAMw_r,
-                             beta[2:4], phi[2:4], theta[2:4], a[2:4])
-            for j in range(3):
-                for w in range(g.nwing):
-                    limpa_r[j, istep, w] = limpa[j, w]
-                    aimpa_r[j, istep, w] = aimpa[j, w]
-                    limpw_r[j, istep, w] = limpw[j, w]
-                    aimpw_r[j, istep, w] = aimpw[j, w]
-
-        # Extract GAMAb (border & shed) from GAM
-        GAMAb_f = GAM_f[:, :nxb_f].copy()
-        GAMAb_r = GAM_r[:, :nxb_r].copy()
-
-        # Calculate velocity of border and wake vortices to be shed or convected
-        # Influence coeff for the border elem vel due to the total wing elem
-        # Self-influence coeff for each wing; calculated at each time step
-        cVBT_f = b_vel_B_by_T_matrix(nxb_f, nxt_f, Xb_f, Xt_f, g.RCUT)
-        cVBT_r = b_vel_B_by_T_matrix(nxb_r, nxt_r, Xb_r, Xt_r, g.RCUT)
-
-        # Border element veocity due to the total wing elements: self-influence
-        # VBTs_m(j,n,ixb,w);  vel on wing w due to total elem on wing w
-        VBTs_f = vel_B_by_T(cVBT_f, GAM_f, nxt_f)
-        VBTs_r = vel_B_by_T(cVBT_r, GAM_r, nxt_r)
-
-        # Border element veocity due to the total wing elements: cross-influence
-        VBTs_12 = cross_vel_B_by_T(Xb_f[..., 0], nxb_f, Xt_f[..., 1], GAM_f[1, :], nxt_f, g.RCUT, LCUT)
-        VBTs_13 = cross_vel_B_by_T(Xb_f[..., 0], nxb_f, Xt_r[..., 0], GAM_r[0, :], nxt_r, g.RCUT, LCUT)
-        VBTs_14 = cross_vel_B_by_T(Xb_f[..., 0], nxb_f, Xt_r[..., 1], GAM_r[1, :], nxt_r, g.RCUT, LCUT)
-        VBTs_21 = cross_vel_B_by_T(Xb_f[..., 1], nxb_f, Xt_f[..., 0], GAM_f[0, :], nxt_f, g.RCUT, LCUT)
-        VBTs_23 = cross_vel_B_by_T(Xb_f[..., 1], nxb_f, Xt_r[..., 0], GAM_r[0, :], nxt_r, g.RCUT, LCUT)
-        VBTs_24 = cross_vel_B_by_T(Xb_f[..., 1], nxb_f, Xt_r[..., 1], GAM_r[1, :], nxt_r, g.RCUT, LCUT)
-        VBTs_31 = cross_vel_B_by_T(Xb_r[..., 0], nxb_r, Xt_f[..., 0], GAM_f[0, :], nxt_f, g.RCUT, LCUT)
-        VBTs_32 = cross_vel_B_by_T(Xb_r[..., 0], nxb_r, Xt_f[..., 1], GAM_f[1, :], nxt_f, g.RCUT, LCUT)
-        VBTs_34 = cross_vel_B_by_T(Xb_r[..., 0], nxb_r, Xt_r[..., 1], GAM_r[1, :], nxt_r, g.RCUT, LCUT)
-        VBTs_41 = cross_vel_B_by_T(Xb_r[..., 1], nxb_r, Xt_f[..., 0], GAM_f[0, :], nxt_f, g.RCUT, LCUT)
-        VBTs_42 = cross_vel_B_by_T(Xb_r[..., 1], nxb_r, Xt_f[..., 1], GAM_f[1, :], nxt_f, g.RCUT, LCUT)
-        VBTs_43 = cross_vel_B_by_T(Xb_r[..., 1], nxb_r, Xt_r[..., 0], GAM_r[0, :], nxt_r, g.RCUT, LCUT)
-
-        # Assemble the total border element velocity due to two wings
-        VBT_f, VBT_r = assemble_vel_B_by_T(nxb_f, VBTs_f, VBTs_12, VBTs_13, VBTs_14, VBTs_21, VBTs_23, VBTs_24,
-                                           nxb_r, VBTs_r, VBTs_31, VBTs_32, VBTs_34, VBTs_41, VBTs_42, VBTs_43)
-
-        # Velocity from wake vortices
-        if istep > 0:
-            # Velocity of the border elements due to wake vortices
+                # Front wing
+                Vncw_f[i, :] = n_vel_T_by_segments(nxt_f, XCk_f[:, :, i], NC_f[:, :, i], *Sw, *K)
+                # Rear wing
+                Vncw_r[i, :] = n_vel_T_by_segments(nxt_r, XCk_r[:, :, i], NC_r[:, :, i], *Sw, *K)
+
+        with timer('cross_matrix'):
+            # Calculation of the time-dependent sub-matrices MVNs_ij (i~=j)
+            MVNs_12 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+            MVNs_13 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
+            MVNs_14 = cross_matrix(XC_f[..., 0], NC_f[..., 0], nxt_f, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+            MVNs_21 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+            MVNs_23 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
+            MVNs_24 = cross_matrix(XC_f[..., 1], NC_f[..., 1], nxt_f, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+            MVNs_31 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+            MVNs_32 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+            MVNs_34 = cross_matrix(XC_r[..., 0], NC_r[..., 0], nxt_r, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+            MVNs_41 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+            MVNs_42 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+            MVNs_43 = cross_matrix(XC_r[..., 1], NC_r[..., 1], nxt_r, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
+
+        with timer('assembly'):
+            # Assemble the total matrix using MVNs_f[:,:,1], MVNs_r[:,:,1], MVNs_ij[:,:]
+            MVN = assemble_matrix(MVNs_f, MVNs_r,
+                                  MVNs_12, MVNs_13, MVNs_14,
+                                  MVNs_21, MVNs_23, MVNs_24,
+                                  MVNs_31, MVNs_32, MVNs_34,
+                                  MVNs_41, MVNs_42, MVNs_43)
+
+        with timer('solution'):
+            # Solve the system of equations
+            GAMA = solution(nxt_f, nxt_r, MVN, Vnc_f, Vncw_f, Vnc_r, Vncw_r)
+
+            # Split GAMA into 4 parts
+            GAM_f = np.zeros((2, nxt_f))
+            GAM_r = np.zeros((2, nxt_r))
+
+            GAM_f[0, 0:nxt_f] = GAMA[0:nxt_f]  # Front right wing
+            GAM_f[1, 0:nxt_f] = GAMA[nxt_f:(2 * nxt_f)]  # Front left  wing
+            GAM_r[0, 0:nxt_r] = GAMA[(2 * nxt_f):(2 * nxt_f + nxt_r)]  # Rear right wing
+            GAM_r[1, 0:nxt_r] = GAMA[(2 * nxt_f + nxt_r):(2 * nxt_f + 2 * nxt_r)]  # Rear left  wing
+
+        with timer('io'):
+            # Save data for plotting GAMA
             for i in range(g.nwing):
-                VBW_f[..., i] = vel_by(istep, Xb_f[..., i], nxb_f, Xw_f, GAMw_f, nxw_f, Xw_r,
-                                                    GAMw_r, nxw_r, g.RCUT, LCUT)
-                VBW_r[..., i] = vel_by(istep, Xb_r[..., i], nxb_r, Xw_f, GAMw_f, nxw_f, Xw_r,
-                                                    GAMw_r, nxw_r, g.RCUT, LCUT)
+                save_plot_data('GAMA', f'GAMA_{g.labels[0][i]}_{t:.4f}',
+                               GAMA=GAM_f[i], XC=XC_f[..., i], NC=NC_f[..., i])
+                save_plot_data('GAMA', f'GAMA_{g.labels[1][i]}_{t:.4f}',
+                               GAMA=GAM_r[i], XC=XC_r[..., i], NC=NC_r[..., i])
 
-            # Velocity of the wake elements due to total wing vortices
-            for i in range(g.nwing):
-                VWT_f[..., :istep * nxb_f, i] = vel_by(istep, Xw_f[..., i], nxw_f, Xt_f, GAM_f, nxt_f,
-                                                              Xt_r, GAM_r, nxt_r, g.RCUT, LCUT)
-                VWT_r[..., :istep * nxb_r, i] = vel_by(istep, Xw_r[:, :, :, i], nxw_r, Xt_f, GAM_f, nxt_f,
-                                                              Xt_r, GAM_r, nxt_r, g.RCUT, LCUT)
+            # Save data for plotting wakes (only the live part of the
+            # preallocated wake arrays)
+            save_plot_data('wake', f'wake_{istep}',
+                           nXb_f=nxb_f, nXw_f=nxw_f, Xb_f=Xb_f, Xw_f=Xw_f[:, :, :nxw_f],
+                           nXb_r=nxb_r, nXw_r=nxw_r, Xb_r=Xb_r, Xw_r=Xw_r[:, :, :nxw_r])
 
-            # Velocity of the wake elements due to wake elements
-            for i in range(g.nwing):
-                VWW_f[..., :istep * nxb_f, i] = vel_by(istep, Xw_f[..., i], nxw_f, Xw_f, GAMw_f, nxw_f,
-                                                              Xw_r, GAMw_r, nxw_r, g.RCUT, LCUT)
-                VWW_r[..., :istep * nxb_r, i] = vel_by(istep, Xw_r[..., i], nxw_r, Xw_f, GAMw_f, nxw_f,
-                                                              Xw_r, GAMw_r, nxw_r, g.RCUT, LCUT)
-
-        # Shed border vortex elements
-        Xs_f = Xb_f + g.dt * (VBT_f + VBW_f)
-        Xs_r = Xb_r + g.dt * (VBT_r + VBW_r)
-
-        # Convect wake vortices
-        if istep > 0:
-            Xw_f = Xw_f + g.dt * (VWT_f + VWW_f)
-            Xw_r = Xw_r + g.dt * (VWT_r + VWW_r)
-
-        # Add shed vortices to wake vortex
-        if istep == 0:
-            # Front wings
-            GAMw_f = GAMAb_f
-            nxw_f = nxb_f
-            Xw_f[:, :, :nxb_f, :] = Xs_f
-            # Rear wings
-            GAMw_r = GAMAb_r
-            nxw_r = nxb_r
-            Xw_r[:, :, :nxb_r, :] = Xs_r
-        else:
-            GAMw_f, nxw_f, Xw_f = add_wake(istep, nxb_f, GAMAb_f, Xs_f, GAMw_f, Xw_f)
-            GAMw_r, nxw_r, Xw_r = add_wake(istep, nxb_r, GAMAb_r, Xs_r, GAMw_r, Xw_r)
+        if g.nstep > 3:  # At least 4 steps needed to calculate forces and moments
+            with timer('impulse'):
+                # Calculate impulses in the body-translating system
+                # Include all of the bound vortices and wake vortices
+                # For istep=1, there are no wake vortices
+                # Front wing
+                limpa, aimpa, limpw, aimpw = \
+                    s_impulse_WT(istep, U, t, Xt_f, Xw_f, GAM_f, GAMw_f,
+                                 beta[0:2], phi[0:2], theta[0:2], a[0:2])
+                for j in range(3):
+                    for w in range(g.nwing):
+                        limpa_f[j, istep, w] = limpa[j, w]
+                        aimpa_f[j, istep, w] = aimpa[j, w]
+                        limpw_f[j, istep, w] = limpw[j, w]
+                        aimpw_f[j, istep, w] = aimpw[j, w]
+                # Rear wing
+                limpa, aimpa, limpw, aimpw = \
+                    s_impulse_WT(istep, U, t, Xt_r, Xw_r, GAM_r, GAMw_r,
+                                 beta[2:4], phi[2:4], theta[2:4], a[2:4])
+                for j in range(3):
+                    for w in range(g.nwing):
+                        limpa_r[j, istep, w] = limpa[j, w]
+                        aimpa_r[j, istep, w] = aimpa[j, w]
+                        limpw_r[j, istep, w] = limpw[j, w]
+                        aimpw_r[j, istep, w] = aimpw[j, w]
+
+            with timer('io'):
+                # Estimate force and moment online to monitor long runs
+                if g.stream_data or g.force_limit > 0:
+                    time, force, moment = \
+                        force_moment_step(g.rho_, v_[0], d_[0], istep, times, U,
+                                          limpa_f, limpa_r, aimpa_f, aimpa_r,
+                                          limpw_f, limpw_r, aimpw_f, aimpw_r)
+                    if g.stream_data:
+                        stream_force_moment(istep, time, force, moment)
+                    if g.force_limit > 0 and np.linalg.norm(force) > g.force_limit:
+                        close_stream()
+                        raise ValueError(f"force exceeds force_limit at time {time:.4f}")
+
+        with timer('border_velocity'):
+            # Vortex line segments of the wings
+            St_f = [source_segments(Nt_f[..., i], edgest_f, segt_f, signt_f,
+                                    GAM_f[i], nxt_f, nst_f, ftype) for i in range(g.nwing)]
+            St_r = [source_segments(Nt_r[..., i], edgest_r, segt_r, signt_r,
+                                    GAM_r[i], nxt_r, nst_r, ftype) for i in range(g.nwing)]
+            St = concat_segments(*St_f, *St_r)
+
+            # Extract GAMAb (border & shed) from GAM
+            GAMAb_f = GAM_f[:, :nxb_f].copy()
+            GAMAb_r = GAM_r[:, :nxb_r].copy()
+
+            # Calculate velocity of border and wake vortices to be shed or convected
+            # Influence coeff for the border elem vel due to the total wing elem
+            # Self-influence coeff for each wing; calculated at each time step
+            cVBT_f = b_vel_B_by_T_matrix(nxb_f, nxt_f, Xb_f, Et1_f, Et2_f, g.RCUT)
+            cVBT_r = b_vel_B_by_T_matrix(nxb_r, nxt_r, Xb_r, Et1_r, Et2_r, g.RCUT)
+
+            # Border element veocity due to the total wing elements: self-influence
+            # VBTs_m(j,n,ixb,w);  vel on wing w due to total elem on wing w
+            VBTs_f = vel_B_by_T(cVBT_f, GAM_f, nxt_f)
+            VBTs_r = vel_B_by_T(cVBT_r, GAM_r, nxt_r)
+
+            # Border element veocity due to the total wing elements: cross-influence
+            Xbk_f = Xb_f.astype(ftype, copy=False)
+            Xbk_r = Xb_r.astype(ftype, copy=False)
+            VBTs_12 = cross_vel_B_by_segments(Xbk_f[..., 0], nxb_f, *St_f[1], *K)
+            VBTs_13 = cross_vel_B_by_segments(Xbk_f[..., 0], nxb_f, *St_r[0], *K)
+            VBTs_14 = cross_vel_B_by_segments(Xbk_f[..., 0], nxb_f, *St_r[1], *K)
+            VBTs_21 = cross_vel_B_by_segments(Xbk_f[..., 1], nxb_f, *St_f[0], *K)
+            VBTs_23 = cross_vel_B_by_segments(Xbk_f[..., 1], nxb_f, *St_r[0], *K)
+            VBTs_24 = cross_vel_B_by_segments(Xbk_f[..., 1], nxb_f, *St_r[1], *K)
+            VBTs_31 = cross_vel_B_by_segments(Xbk_r[..., 0], nxb_r, *St_f[0], *K)
+            VBTs_32 = cross_vel_B_by_segments(Xbk_r[..., 0], nxb_r, *St_f[1], *K)
+            VBTs_34 = cross_vel_B_by_segments(Xbk_r[..., 0], nxb_r, *St_r[1], *K)
+            VBTs_41 = cross_vel_B_by_segments(Xbk_r[..., 1], nxb_r, *St_f[0], *K)
+            VBTs_42 = cross_vel_B_by_segments(Xbk_r[..., 1], nxb_r, *St_f[1], *K)
+            VBTs_43 = cross_vel_B_by_segments(Xbk_r[..., 1], nxb_r, *St_r[0], *K)
+
+            # Assemble the total border element velocity due to two wings
+            VBT_f, VBT_r = assemble_vel_B_by_T(nxb_f, VBTs_f, VBTs_12, VBTs_13, VBTs_14, VBTs_21, VBTs_23, VBTs_24,
+                                               nxb_r, VBTs_r, VBTs_31, VBTs_32, VBTs_34, VBTs_41, VBTs_42, VBTs_43)
+
+            # Border nodes and their velocity due to the total wing elements
+            Nb_f = to_nodes(Xb_f, first_f)
+            Nb_r = to_nodes(Xb_r, first_r)
+            VBTn_f = to_nodes(VBT_f, first_f)
+            VBTn_r = to_nodes(VBT_r, first_r)
+
+        with timer('wake_velocity'):
+            # Velocity from wake vortices
+            if istep > 0:
+                # Evaluate the velocities due to the wing segments (VWT) and the wake
+                # segments (VBW, VWW) in a single batch; the border nodes only see
+                # the wake segments
+                S1, S2, GAMS = concat_segments(St, Sw)
+                ns_t = len(St[2])
+                ns = len(GAMS)
+                V = vel_batch_groups([(Nb_f[..., i], ns_t, ns) for i in range(g.nwing)]
+                                     + [(Nb_r[..., i], ns_t, ns) for i in range(g.nwing)]
+                                     + [(Nw_f[:, :nnw_f, i], 0, ns) for i in range(g.nwing)]
+                                     + [(Nw_r[:, :nnw_r, i], 0, ns) for i in range(g.nwing)],
+                                     S1, S2, GAMS, ns_t, *K)
+                n = g.nwing
+                Vb_f, Vb_r, Vw_f, Vw_r = V[:n], V[n:2 * n], V[2 * n:3 * n], V[3 * n:]
+
+                for i in range(g.nwing):
+                    # Velocity of the border nodes due to wake vortices
+                    VBW_f[..., i] = Vb_f[i][1]
+                    VBW_r[..., i] = Vb_r[i][1]
+                    # Velocity of the wake nodes due to total wing vortices
+                    VWT_f[:, :nnw_f, i] = Vw_f[i][0]
+                    VWT_r[:, :nnw_r, i] = Vw_r[i][0]
+                    # Velocity of the wake nodes due to wake vortices
+                    VWW_f[:, :nnw_f, i] = Vw_f[i][1]
+                    VWW_r[:, :nnw_r, i] = Vw_r[i][1]
+
+            # Velocity of the wake vortices
+            VW_f = VWT_f + VWW_f
+            VW_r = VWT_r + VWW_r
+
+        with timer('convection'):
+            # Choose the time increment of this step from the change in the wake
+            # velocities over the previous step and the rotation rate of the wings
+            if g.adaptive:
+                # RMS over the wake; the maximum is dominated by the few vortex
+                # elements that pass within the cutoff distance of each other
+                s_f, s_r = nnw_f_old, nnw_r_old
+                dV2 = np.concatenate((np.sum((VW_f[:, :s_f] - VW_f_old[:, :s_f])**2, axis=0).ravel(),
+                                      np.sum((VW_r[:, :s_r] - VW_r_old[:, :s_r])**2, axis=0).ravel()))
+                dV = np.sqrt(np.mean(dV2)) if dV2.size else 0.0
+                rate = max(np.max(np.abs(dph)), np.max(np.abs(dth)))
+                dt_old, dt = dt, adaptive_dt(dt, dV, rate, t_end - t)
+
+            # Shed border vortex nodes
+            Ns_f = Nb_f + dt * (VBTn_f + VBW_f)
+            Ns_r = Nb_r + dt * (VBTn_r + VBW_r)
+            Xs_f = to_corners(Ns_f, conn_f)
+            Xs_r = to_corners(Ns_r, conn_r)
+
+            # Convect wake nodes
+            if istep > 0:
+                Nw_f = convect_wake(Nw_f, VW_f, VW_f_old, nnw_f_old, dt, dt_old, g.scheme)
+                Nw_r = convect_wake(Nw_r, VW_r, VW_r_old, nnw_r_old, dt, dt_old, g.scheme)
+
+                VW_f_old, nnw_f_old = VW_f, nnw_f
+                VW_r_old, nnw_r_old = VW_r, nnw_r
+
+            # Add shed nodes to wake nodes
+            Nw_f[:, nnw_f:nnw_f + nnb_f] = Ns_f
+            Nw_r[:, nnw_r:nnw_r + nnb_r] = Ns_r
+            nnw_f += nnb_f
+            nnw_r += nnb_r
+
+            # Add shed vortices to wake vortex
+            if istep == 0:
+                # Front wings
+                GAMw_f = GAMAb_f
+                nxw_f = nxb_f
+                Xw_f[:, :, :nxb_f, :] = Xs_f
+                # Rear wings
+                GAMw_r = GAMAb_r
+                nxw_r = nxb_r
+                Xw_r[:, :, :nxb_r, :] = Xs_r
+            else:
+                GAMw_f, nxw_f, Xw_f = add_wake(istep, nxb_f, GAMAb_f, Xs_f, GAMw_f, Xw_f)
+                GAMw_r, nxw_r, Xw_r = add_wake(istep, nxb_r, GAMAb_r, Xs_r, GAMw_r, Xw_r)
+
+            # Rebuild the wake elements from the convected wake nodes
+            Xw_f[:, :, :nxw_f] = to_corners(Nw_f, connw_f[:, :nxw_f])
+            Xw_r[:, :, :nxw_r] = to_corners(Nw_r, connw_r[:, :nxw_r])
+
+        if t >= t_end - 1e-6 * g.dt_min:
+            break
+        t = t + dt if g.adaptive else (istep + 1) * g.dt
     # END TIME MARCH
+    close_stream()
+
+    if g.adaptive:
+        print(f"adaptive time march: {istep + 1} steps ({g.nstep} steps of dt)")
 
     # Calculate the force and moment on the airfoil
+    set_step(-1)
     if g.nstep > 3:
-        force_moment(g.rho_, v_[0], d_[0], g.nstep, g.dt, U,
-                     limpa_f, limpa_r, aimpa_f, aimpa_r,
-                     limpw_f, limpw_r, aimpw_f, aimpw_r)
+        with timer('force'):
+            if g.adaptive:
+                # Resample the impulses onto the uniform time grid
+                n = istep + 1
+                times_uniform = g.dt * np.arange(1, g.nstep + 1)
+                limpa_f, limpa_r, aimpa_f, aimpa_r, limpw_f, limpw_r, aimpw_f, aimpw_r = \
+                    [resample_impulse(times[:n], imp[:, :n], times_uniform)
+                     for imp in (limpa_f, limpa_r, aimpa_f, aimpa_r,
+                                 limpw_f, limpw_r, aimpw_f, aimpw_r)]
+
+            return force_moment(g.rho_, v_[0], d_[0], g.nstep, g.dt, U,
+                                limpa_f, limpa_r, aimpa_f, aimpa_r,
+                                limpw_f, limpw_r, aimpw_f, aimpw_r)
+
+def grow(x, axis, n):
+    """x extended with zeros to length n along axis"""
+    pad = [(0, 0)] * x.ndim
+    pad[axis] = (0, n - x.shape[axis])
+
+    return np.pad(x, pad)
 
 def run_simulation():
     if g.flush_directories: #delete directories
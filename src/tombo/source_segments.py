@@ -0,0 +1,105 @@
+import numpy as np
+
+def segment_table(conn):
+    """
+    Unique vortex line segments of a set of elements; an edge shared by
+    two elements is a single segment
+
+    Parameters
+    ----------
+    conn: ndarray[n, i]
+        Node at corner n of element i, from `node_table()`
+
+    Returns
+    -------
+    edges: ndarray[2, iS]
+        Start and end node of each segment
+    seg: ndarray[n, i]
+        Segment of the edge from corner n to corner n + 1 of element i
+    sign: ndarray[n, i]
+        1 if that edge has the same direction as its segment, else -1
+    """
+    nX = conn.shape[1]
+    seg = np.zeros((4, nX), dtype=np.int64)
+    sign = np.zeros((4, nX), dtype=np.int64)
+    index = {}
+    edges = []
+
+    for i in range(nX):
+        for n in range(4):
+            a = conn[n, i]
+            b = conn[(n + 1) % 4, i]
+            if (b, a) in index:
+                seg[n, i] = index[(b, a)]
+                sign[n, i] = -1
+            else:
+                if (a, b) not in index:
+                    index[(a, b)] = len(edges)
+                    edges.append((a, b))
+                seg[n, i] = index[(a, b)]
+                sign[n, i] = 1
+
+    return np.array(edges, dtype=np.int64).T.reshape(2, -1), seg, sign
+
+def wake_segment_table(edges, seg, sign, nnode, nrow):
+    """
+    Segment table of a wake made of nrow rows of shed elements (see
+    `wake_table()`); row s uses nodes s * nnode to (s + 1) * nnode and
+    segments s * nS to (s + 1) * nS, where nS is the number of segments
+    of one row
+
+    Returns
+    -------
+    edges_w, seg_w, sign_w:
+        As in `segment_table()`, for all rows
+    """
+    nS = edges.shape[1]
+    nX = seg.shape[1]
+    rows = np.arange(nrow)
+
+    edges_w = (edges[:, np.newaxis, :] + nnode * rows[:, np.newaxis]).reshape(2, nrow * nS)
+    seg_w = (seg[:, np.newaxis, :] + nS * rows[:, np.newaxis]).reshape(4, nrow * nX)
+    sign_w = np.tile(sign, (1, nrow))
+
+    return edges_w, seg_w, sign_w
+
+def source_segments(N, edges, seg, sign, GAM, nX, nS, dtype=np.float64):
+    """
+    Vortex line segments of the first nX elements; the circulation of a
+    shared edge is the difference of the circulations of its two elements
+
+    Parameters
+    ----------
+    N: ndarray[j, iN]
+        Location of the nodes
+    edges, seg, sign:
+        Segment table, from `segment_table()`
+    GAM: ndarray[i]
+        Circulation of the elements
+    nX: int
+        Number of elements
+    nS: int
+        Number of segments used by the first nX elements
+    dtype: data-type
+        Precision of the returned segments
+
+    Returns
+    -------
+    S1, S2: ndarray[j, iS]
+        Start and end points of the segments
+    GAMS: ndarray[iS]
+        Circulation of the segments
+    """
+    GAMS = np.zeros(nS)
+    np.add.at(GAMS, seg[:, :nX].ravel(), (sign[:, :nX] * GAM[:nX]).ravel())
+
+    return (N[:, edges[0, :nS]].astype(dtype, copy=False),
+            N[:, edges[1, :nS]].astype(dtype, copy=False),
+            GAMS.astype(dtype, copy=False))
+
+def concat_segments(*segments):
+    """
+    Concatenate the (S1, S2, GAMS) segments of several sources into one
+    """
+    S1, S2, GAMS = zip(*segments)
+    return np.hstack(S1), np.hstack(S2), np.hstack(GAMS)
@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import tombo.globals as g
+from tombo.plotting import save_plot_data
 
 def symmetric_5_sided_mesh(wing, lt_, lr_, bang_, hfactor, wfactor):
     """
@@ -51,18 +52,23 @@ def symmetric_5_sided_mesh(wing, lt_, lr_, bang_, hfactor, wfactor):
     c_ = 2.0 * lt_ * np.sin(bang)
     h = c_ * hfactor
     
-    Xb, nXb, Nb, Lt, Lr, C, n, wi_1 = WingBorder(lt_, lr_, bang, l_, c_, hfactor, wfactor)
-    Xc, nXc, Nc = WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered)
-
-    if g.save_data:
-        # Save data for plotting
-        np.savez(f'{g.data_folder}/mesh2d/mesh2d_{wing}',
-                 Xb=Xb, nXb=nXb, Xc=Xc, nXc=nXc)
-        np.savez(f'{g.data_folder}/mesh3d/mesh3d_{wing}',
-                 Xb=Xb, nXb=nXb, Nb=Nb, Xc=Xc, nXc=nXc, Nc=Nc)
+    Xb, nXb, Nb, Lt, Lr, C, n, wi_1, fc, fs = \
+        WingBorder(lt_, lr_, bang, l_, c_, hfactor, wfactor)
+    Xc, nXc, Nc = WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered, fc, fs)
+
+    save_mesh_plot_data(wing, Xb, nXb, Nb, Xc, nXc, Nc)
        
     return Xb, nXb, Nb, Xc, nXc, Nc, l_, c_, h
 
+def save_mesh_plot_data(wing, Xb, nXb, Nb, Xc, nXc, Nc):
+    """
+    Save the data for plotting the mesh of the front ('f') or rear ('r') wing
+    """
+    save_plot_data('mesh2d', f'mesh2d_{wing}',
+                   Xb=Xb, nXb=nXb, Xc=Xc, nXc=nXc)
+    save_plot_data('mesh3d', f'mesh3d_{wing}',
+                   Xb=Xb, nXb=nXb, Nb=Nb, Xc=Xc, nXc=nXc, Nc=Nc)
+
 def WingBorder(lt, lr, bang, l_, c_, hfactor, wfactor):
     """
     Create mesh for border region of the wing
@@ -99,6 +105,9 @@ def WingBorder(lt, lr, bang, l_, c_, hfactor, wfactor):
         Number of rectangles in each border strip
     wi_0: float
         TODO
+    fc, fs: ndarray
+        Node fractions of the graded chordwise and spanwise elements
+        (see `GradedNodes()`), or None if they are uniform
     """
     NUM_BORDER_STRIPS = 5
     h = hfactor * c_    # Dimensional border height
@@ -116,10 +125,22 @@ def WingBorder(lt, lr, bang, l_, c_, hfactor, wfactor):
     else:
         n, w, wi, wf, Lt, Lr, C = BStripElongated(lt, lr, c_, bang, h)
 
+    # Middle elements of the tip strip (3) graded toward the leading and
+    # trailing edges, and of the straight edge strips (2, 4) toward the tip;
+    # the center region uses the same nodes
+    w = list(w)
+    fc = fs = None
+    if g.chord_grading != 1:
+        fc = GradedNodes(n[2], g.chord_grading, symmetric=True)
+        w[2] = n[2] * w[2] * np.diff(fc)
+    if g.span_grading != 1:
+        fs = GradedNodes(n[1], g.span_grading, symmetric=False)
+        w[1] = n[1] * w[1] * np.diff(fs)
+        w[3] = w[1][::-1]
+
     sumn = np.sum(n)
     nXb = sumn # No Corner Elements
     Xb = np.zeros((3, 5, nXb))
-    Nb = np.zeros((3, nXb))
 
     inf = -1
 
@@ -138,15 +159,14 @@ def WingBorder(lt, lr, bang, l_, c_, hfactor, wfactor):
     Xb[2, :, :] = Camber(Xb[0, ...], Xb[1, ...], l_, c_, g.icamber, g.acamber)
 
     # Unit normal to the element
-    for i in range(nXb):
-        Nb[:, i] = uNormal(Xb[0, :, i], Xb[1, :, i], Xb[2, :, i])
+    Nb = uNormal(Xb[0], Xb[1], Xb[2])
 
     # Centroid
     Xb[:, 4, :] = 0.25 * (Xb[:, 0, :] + Xb[:, 1, :] + Xb[:, 2, :] + Xb[:, 3, :])
 
     wi_0 = wi[0]
 
-    return Xb, nXb, Nb, Lt, Lr, C, n, wi_0
+    return Xb, nXb, Nb, Lt, Lr, C, n, wi_0, fc, fs
 
 def BStrip(lt, lr, c, bang, h, wfactor):
     """
@@ -301,7 +321,7 @@ def BStripElongated(lt, lr, c, bang, h):
     tmp = C / h + float_eps  # Add the smallest number to avoid truncation
 
     r = C % h
-    n = np.zeros(5)
+    n = np.zeros(5, dtype=int)
     w = np.zeros(5)
     wi = np.zeros(5)
     wf = np.zeros(5)
@@ -353,8 +373,8 @@ def BRelemLoc(m, wi, w, wf, h):
         Number of middle elements
     wi: float
         Width on initial elements
-    w: float
-        Width of middle elements
+    w: float or ndarray[m]
+        Width of middle elements (uniform or each of them)
     wf: 
         Width of final elements
     h: float
@@ -378,10 +398,14 @@ def BRelemLoc(m, wi, w, wf, h):
     ww[m+1] = wf
 
     # Coordinates of 5 nodes of elements
+    if np.ndim(w) == 0:
+        y[1:] = wi + (np.arange(1, m + 2) - 0.5) * w
+        wm = m * w
+    else:
+        y[1:(m+1)] = wi + np.cumsum(w) - 0.5 * w
+        wm = np.sum(w)
     y[0] = 0.5 * wi
-    for i in range(1, m+2):
-        y[i] = wi + (i - 0.5) * w
-    y[m + 1] = wi + m * w + 0.5 * wf
+    y[m + 1] = wi + wm + 0.5 * wf
 
     xeE[0, 0:2, :] = 0.0
     xeE[0, 2:4, :] = h
@@ -451,11 +475,11 @@ def Camber(x, y, l_, c_, icamber, amplitude):
     if icamber == 0:
         z = np.zeros(x.shape)
     elif icamber == 1:
-        z = amplitude * (np.pow(float(-(x / (0.5 * c_))), 2) + 1)
+        z = amplitude * ((-(x / (0.5 * c_)))**2 + 1)
     elif icamber == 2:
-        z = amplitude * (np.pow(float(-(y / l_)), 2) + 1)
+        z = amplitude * ((-(y / l_))**2 + 1)
     elif icamber == 3:
-        z = amplitude * (np.pow(float(-(x / (0.6 * c_))), 2) + 1) * (np.pow(float(-(y / l_)), 2) + 1)
+        z = amplitude * ((-(x / (0.6 * c_)))**2 + 1) * ((-(y / l_))**2 + 1)
     else:
         raise ValueError("invalid value for icamber")
 
@@ -463,27 +487,27 @@ def Camber(x, y, l_, c_, icamber, amplitude):
 
 def uNormal(x, y, z):
     """
-    Calculate the unit normal to a rectangular element
+    Calculate the unit normals to rectangular elements
 
     Parameters
     ----------
-    x, y, z: ndarrays
-        Coordinates of the nodes of the element
+    x, y, z: ndarrays[n, ...]
+        Coordinates of the nodes n of the elements
 
     Returns
     -------
-    uN: ndarray
-        Unit normal to the rectangular plane
+    uN: ndarray[j, ...]
+        Unit normals to the rectangular planes
     """
     
-    node = np.hstack((x[:, np.newaxis], y[:, np.newaxis], z[:, np.newaxis]))
-    N = np.cross(node[2, :] - node[0, :], node[1, :] - node[3, :])
-    magN = np.linalg.norm(N)
+    node = np.stack((x, y, z))
+    N = np.cross(node[:, 2] - node[:, 0], node[:, 1] - node[:, 3], axis=0)
+    magN = np.linalg.norm(N, axis=0)
     uN = N / magN
 
     return uN
 
-def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
+def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered, fc=None, fs=None):
     """
     Create mesh for center region of the wing
 
@@ -502,6 +526,9 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
         Number of rectangles in each border strip
     wi_0: float
         TODO
+    fc, fs: ndarray
+        Node fractions of the graded chordwise and spanwise elements,
+        or None if they are uniform
 
     Returns
     -------
@@ -513,7 +540,7 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
         Unit normals to the center elements
     """
 
-    Xct, Xcr = CRnodes(Lt, Lr, C, bang, n) # Coordinates of the nodes for the center region
+    Xct, Xcr = CRnodes(Lt, Lr, C, bang, n, fc, fs) # Coordinates of the nodes for the center region
 
     """
     RECTANGULAR MESH POINTS BY ROWS (x-direction) & COLUMNS (y-direction)
@@ -524,69 +551,29 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
     x - horizontal, y - vertical direction
     """
 
-    XctS = np.empty([2, 4, n[2], n[0]])
-    XcrS = np.empty([2, 4, n[2], n[1]])
-    XcrR = np.empty([2, 4, n[1] * n[2]])
+    # Elements ordered by columns, then rows
+    XcrR = CRelem(Xcr).reshape(2, 4, n[1] * n[2])
+    nXcrR = XcrR.shape[2]
 
     if is_tapered:
-        # Tapered Region
-        for ic in range(n[0]):
-            for ir in range(n[2]):
-                XctS[:, 0, ir, ic] = Xct[:, ir    , ic    ]
-                XctS[:, 1, ir, ic] = Xct[:, ir    , ic + 1]
-                XctS[:, 2, ir, ic] = Xct[:, ir + 1, ic + 1]
-                XctS[:, 3, ir, ic] = Xct[:, ir + 1, ic    ]
-    # Rectangular Region
-    for ic in range(n[1]):
-        for ir in range(n[2]):
-            XcrS[:, 0, ir, ic] = Xcr[:, ir    , ic    ]
-            XcrS[:, 1, ir, ic] = Xcr[:, ir    , ic + 1]
-            XcrS[:, 2, ir, ic] = Xcr[:, ir + 1, ic + 1]
-            XcrS[:, 3, ir, ic] = Xcr[:, ir + 1, ic    ]
-
-    # Rectangular and Polygon Mesh
-    if is_tapered:
-        # Tapered Region - Triangular Apex Mesh w/ 4 Nodes
-        i = 0
-        ic = 0
-        XctR = np.empty((2, 4, (n[0] - 1) * n[2] + 1)) 
-
-        XctR[:, 0, i] = XctS[:, 0, 0, ic]
-        XctR[:, 1, i] = XctS[:, 1, 0, ic]
-        XctR[:, 3, i] = XctS[:, 2, n[2] - 1, ic]
-
-        XctR[0, 2, i] = 0.0
-        XctR[1, 2, i] = XctS[1, 1, 0, ic]
-        i += 1
-
-        # Four-sided meshes
-        for ic in range(1, n[0]):
-            for ir in range(n[2]):
-                XctR[:, 0, i] = XctS[:, 0, ir, ic]
-                XctR[:, 1, i] = XctS[:, 1, ir, ic]
-                XctR[:, 2, i] = XctS[:, 2, ir, ic]
-                XctR[:, 3, i] = XctS[:, 3, ir, ic]
-                i += 1
-        
-        nXctR = i
+        # Tapered Region - Triangular Apex Mesh w/ 4 Nodes, followed by
+        # the four-sided meshes of the other columns
+        XctS = CRelem(Xct)
+        XctR = np.empty((2, 4, (n[0] - 1) * n[2] + 1))
 
-    # Rectangular Region
-    i = 0
-    for ic in range(n[1]):
-        for ir in range(n[2]):
-            XcrR[:, 0, i] = XcrS[:, 0, ir, ic]
-            XcrR[:, 1, i] = XcrS[:, 1, ir, ic]
-            XcrR[:, 2, i] = XcrS[:, 2, ir, ic]
-            XcrR[:, 3, i] = XcrS[:, 3, ir, ic]
-            i += 1
-    
-    nXcrR = i
+        XctR[:, 0, 0] = XctS[:, 0, 0, 0]
+        XctR[:, 1, 0] = XctS[:, 1, 0, 0]
+        XctR[:, 3, 0] = XctS[:, 2, 0, n[2] - 1]
+        XctR[0, 2, 0] = 0.0
+        XctR[1, 2, 0] = XctS[1, 1, 0, 0]
+
+        XctR[:, :, 1:] = XctS[:, :, 1:].reshape(2, 4, -1)
+        nXctR = XctR.shape[2]
 
     if is_tapered:
         # Total Center Rectangular Elements
         nXc = nXctR + nXcrR
         Xc = np.zeros((3, 5, nXc))
-        Nc = np.zeros((3, nXc))
 
         Xc[:2, :4, :nXctR] = XctR 
         Xc[:2, :4, nXctR:nXc] = XcrR
@@ -595,8 +582,7 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
         Xc[2, :, :] = Camber(Xc[0, :, :], Xc[1, :, :], l_, c_, g.icamber, g.acamber)
         
         # Unit Normal to the element
-        for i in range(nXc):
-            Nc[:, i] = uNormal(Xc[0, :, i], Xc[1, :, i], Xc[2, :, i])
+        Nc = uNormal(Xc[0], Xc[1], Xc[2])
 
         # Centroid
         Xc[:, 4, :] = 0.25 * Xc.sum(axis=1)
@@ -608,7 +594,6 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
         # Total center rectangular element
         nXc = nXcrR
         Xc = np.zeros((3, 5, nXc))
-        Nc = np.zeros((3, nXc))
 
         Xc[:2, :4, 0:nXc] = XcrR
         
@@ -616,8 +601,7 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
         Xc[2, :, :] = Camber(Xc[0, :, :], Xc[1, :, :], l_, c_, g.icamber, g.acamber)
         
         # Unit normal to the element
-        for i in range(nXc):
-            Nc[:, i] = uNormal(Xc[0, :, i], Xc[1, :, i], Xc[2, :, i])
+        Nc = uNormal(Xc[0], Xc[1], Xc[2])
         
         # Centroid 
         Xc[:, 4, :] = 0.25 * Xc.sum(axis=1)
@@ -628,7 +612,7 @@ def WingCenter(Lt, Lr, C, bang, l_, c_, h, n, wi_1, is_tapered):
 
     return Xc, nXc, Nc
 
-def CRnodes(Lt, Lr, C, bang, n):
+def CRnodes(Lt, Lr, C, bang, n, fc=None, fs=None):
     """
     Coordinates of the nodes for the rectangular mesh in the center region
 
@@ -645,6 +629,9 @@ def CRnodes(Lt, Lr, C, bang, n):
         Base angle (angle between tapered edge and centerline) of the wing in radians
     n: ndarray
         Number of rectangles in each border strip
+    fc, fs: ndarray
+        Node fractions of the graded rows (chordwise) and columns of the
+        rectangular region (spanwise), or None if they are uniform
 
     Returns
     -------
@@ -656,33 +643,78 @@ def CRnodes(Lt, Lr, C, bang, n):
     
     # Angle and length of radial lines
     e = Lt * np.cos(bang)
-    lt = np.zeros(n[2] + 1)
-    ang = np.zeros(n[2] + 1)
     Xct = np.zeros([2, n[2] + 1, n[0] + 1])
     Xcr = np.zeros([2, n[2] + 1, n[1] + 1])
 
-    for i in range(n[2] + 1):
-        z = (-0.5 + i / n[2]) * C
-        lt[i] = np.sqrt(z ** 2 + e ** 2)
-        ang[i] = np.arccos(z / lt[i])
+    if fc is None:
+        fc = np.arange(n[2] + 1) / n[2]
+    z = (-0.5 + fc) * C
+    lt = np.sqrt(z ** 2 + e ** 2)
+    ang = np.arccos(z / lt)
 
     # Tapered Region
-    for ir in range(n[2] + 1):
-        theta = ang[ir]
-        dlt = lt[ir] / n[0]
-        for ic in range(n[0] + 1):
-            r = ic * dlt
-            Xct[0, ir, ic] = r * np.cos(theta)
-            Xct[1, ir, ic] = r * np.sin(theta)
+    r = np.arange(n[0] + 1) * (lt / n[0])[:, np.newaxis]
+    Xct[0] = r * np.cos(ang)[:, np.newaxis]
+    Xct[1] = r * np.sin(ang)[:, np.newaxis]
 
     # Rectangular Region
     y0 = Lt * np.cos(bang)
     dy = Lr / n[1]
-    for ir in range(n[2] + 1):
-        x = lt[ir] * np.cos(ang[ir])
-        for ic in range(n[1] + 1):
-            y = y0 + ic * dy
-            Xcr[0, ir, ic] = x
-            Xcr[1, ir, ic] = y
+    Xcr[0] = (lt * np.cos(ang))[:, np.newaxis]
+    if fs is None:
+        Xcr[1] = y0 + np.arange(n[1] + 1) * dy
+    else:
+        Xcr[1] = y0 + fs * Lr
 
     return Xct, Xcr
+
+def GradedNodes(n, ratio, symmetric):
+    """
+    Nodes of n elements whose widths change geometrically from the
+    largest to the smallest by `ratio`, as fractions of the total length
+
+    Parameters
+    ----------
+    n: int
+        Number of elements
+    ratio: float
+        Ratio of the largest to the smallest width (1 for uniform widths)
+    symmetric: bool
+        If `True`, the elements are smallest at both ends and largest in
+        the middle; if `False`, they shrink from the start to the end
+
+    Returns
+    -------
+    f: ndarray[n + 1]
+        Nodes, from f[0] = 0 to f[n] = 1
+    """
+    k = np.arange(n)
+    if symmetric:
+        d = np.minimum(k, n - 1 - k)
+        d = d / max(d.max(), 1)
+    else:
+        d = 1.0 - k / max(n - 1, 1)
+
+    w = ratio ** d
+    f = np.concatenate(([0.0], np.cumsum(w))) / np.sum(w)
+    f[-1] = 1.0
+
+    return f
+
+def CRelem(X):
+    """
+    Rectangular elements of a grid of nodes in the center region
+
+    Parameters
+    ----------
+    X: ndarray[j, ir, ic]
+        Nodes by rows (x-direction) & columns (y-direction)
+
+    Returns
+    -------
+    XS: ndarray[j, n, ic, ir]
+        Nodes n of the element in column ic and row ir
+    """
+    XS = np.stack((X[:, :-1, :-1], X[:, :-1, 1:], X[:, 1:, 1:], X[:, 1:, :-1]), axis=1)
+
+    return XS.transpose(0, 1, 3, 2)
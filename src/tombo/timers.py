@@ -0,0 +1,100 @@
+import json
+import time
+from contextlib import contextmanager
+
+# Wall time of each stage of the simulation in each time step (step -1 is
+# outside the time march: the setup and the final force calculation) while
+# profiling; None when the timers are disabled
+_times = None
+_step = -1
+
+def start_timers():
+    """Enable the stage timers and clear the times recorded so far"""
+    global _times, _step
+
+    _times = {}
+    _step = -1
+
+def stop_timers():
+    """
+    Disable the stage timers
+
+    Returns
+    -------
+    times: dict
+        Wall time in seconds of each stage in each step, as
+        {stage: {step: seconds}}; step -1 is outside the time march
+    """
+    global _times
+
+    times, _times = _times, None
+    return times
+
+def set_step(istep):
+    """Attribute the stages timed from now on to time step istep"""
+    global _step
+
+    _step = istep
+
+@contextmanager
+def timer(stage):
+    """
+    Add the wall time of the enclosed block to the time of the stage in
+    the current step; does nothing unless the timers are enabled
+    """
+    if _times is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps = _times.setdefault(stage, {})
+        steps[_step] = steps.get(_step, 0.0) + time.perf_counter() - start
+
+def summary(times):
+    """
+    Aggregate the times from `stop_timers()` over the steps
+
+    Returns
+    -------
+    profile: dict
+        Total, mean and maximum time per step and the share of the total
+        time of each stage, and the time of each step. The time outside
+        the time march is reported separately as 'setup', and the time of
+        the first step as 'first_step': it includes the compilation of the
+        kernels that are not in the Numba cache yet, so neither is included
+        in the mean and maximum
+    """
+    nstep = max((s for steps in times.values() for s in steps), default=-1) + 1
+    total = sum(sum(steps.values()) for steps in times.values())
+
+    stages = {}
+    for stage, steps in times.items():
+        march = [steps.get(s, 0.0) for s in range(nstep)]
+        stages[stage] = {
+            'total': sum(steps.values()),
+            'setup': steps.get(-1, 0.0),
+            'first_step': steps.get(0, 0.0),
+            'mean_per_step': sum(march[1:]) / (nstep - 1) if nstep > 1 else 0.0,
+            'max_per_step': max(march[1:], default=0.0),
+            'fraction': sum(steps.values()) / total if total else 0.0,
+            'steps': march,
+        }
+
+    return {'nstep': nstep, 'total': total, 'stages': stages}
+
+def print_summary(profile):
+    print(f"{'stage':<20}{'total (s)':>12}{'setup (s)':>12}{'first (s)':>12}"
+          f"{'mean/step (ms)':>16}{'max/step (ms)':>16}{'share':>8}")
+    for stage, s in sorted(profile['stages'].items(), key=lambda x: -x[1]['total']):
+        print(f"{stage:<20}{s['total']:>12.3f}{s['setup']:>12.3f}{s['first_step']:>12.3f}"
+              f"{1e3 * s['mean_per_step']:>16.2f}{1e3 * s['max_per_step']:>16.2f}"
+              f"{s['fraction']:>8.1%}")
+    print(f"{'total':<20}{profile['total']:>12.3f}  ({profile['nstep']} steps; the first "
+          f"includes compilation and is not in the mean and max per step)")
+
+def export_json(profile, path):
+    with open(path, 'w') as file:
+        json.dump(profile, file, indent=2)
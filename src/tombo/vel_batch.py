@@ -0,0 +1,85 @@
+import numpy as np
+from numba import njit
+from tombo.vortex_segments import vortex_segments
+
+@njit(cache=True)
+def vel_batch(T, nT, S1, S2, GAMS, split, lo, hi, RCUT, LCUT, FOURPI, DELTA2):
+    """
+    Calculate velocity at a batch of target nodes due to a batch of source
+    vortex line segments in a single pass
+
+    Each target only sees the sources lo[i]:hi[i]; the contributions of
+    the sources before and after split are returned separately (e.g. for
+    the bound and wake segments). The targets, sources and constants
+    (RCUT, LCUT, FOURPI = 4 * pi, DELTA2) set the precision of the
+    calculation (see `vortex_segments()`)
+
+    Parameters
+    ----------
+    T: ndarray[j, iT]
+        Coordinate j of target node iT
+    nT: int
+        Number of target nodes
+    S1, S2: ndarray[j, iS]
+        Start and end points of the source segments
+    GAMS: ndarray[iS]
+        Circulation of the source segments
+    split: int
+        Index of the first source of the second group
+    lo, hi: ndarray[iT]
+        Range of sources seen by each target
+
+    Returns
+    -------
+    Va, Vb: ndarray[j, iT]
+        Induced velocity due to the sources before and after split
+    """
+    Va = np.zeros((3, nT))
+    Vb = np.zeros((3, nT))
+
+    for i in range(nT):
+        x = T[0, i]
+        y = T[1, i]
+        z = T[2, i]
+
+        u, v, w = vortex_segments(x, y, z, S1, S2, GAMS, lo[i], min(hi[i], split),
+                                  RCUT, LCUT, FOURPI, DELTA2)
+        Va[0, i] = u
+        Va[1, i] = v
+        Va[2, i] = w
+
+        u, v, w = vortex_segments(x, y, z, S1, S2, GAMS, max(lo[i], split), hi[i],
+                                  RCUT, LCUT, FOURPI, DELTA2)
+        Vb[0, i] = u
+        Vb[1, i] = v
+        Vb[2, i] = w
+
+    return Va, Vb
+
+def vel_batch_groups(groups, S1, S2, GAMS, split, RCUT, LCUT, FOURPI, DELTA2):
+    """
+    Evaluate `vel_batch()` for several groups of target nodes at once
+
+    Parameters
+    ----------
+    groups: list of (N, lo, hi)
+        Target nodes N[j, iN] of each group and the range of sources they
+        see, either for the whole group (int) or per node (ndarray[iN])
+    S1, S2, GAMS, split, RCUT, LCUT, FOURPI, DELTA2:
+        Source segments and constants, as in `vel_batch()`; the targets
+        are converted to the precision of the sources
+
+    Returns
+    -------
+    V: list of (Va, Vb)
+        Induced velocity at the nodes of each group, as in `vel_batch()`
+    """
+    sizes = [N.shape[1] for N, _, _ in groups]
+    T = np.hstack([N for N, _, _ in groups]).astype(S1.dtype)
+    lo = np.concatenate([np.broadcast_to(lo, n) for (_, lo, _), n in zip(groups, sizes)]).astype(np.int64)
+    hi = np.concatenate([np.broadcast_to(hi, n) for (_, _, hi), n in zip(groups, sizes)]).astype(np.int64)
+
+    Va, Vb = vel_batch(T, T.shape[1], S1, S2, GAMS, split, lo, hi, RCUT, LCUT, FOURPI, DELTA2)
+
+    offsets = np.cumsum(sizes)[:-1]
+    return list(zip(np.split(Va, offsets, axis=1), np.split(Vb, offsets, axis=1)))
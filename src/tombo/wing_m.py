@@ -1,9 +1,11 @@
 import numpy as np
+from functools import lru_cache
 
 def wing_m(mpath, t, rt, tau, e, gMax, p, rtOff, phiT, phiB):
     """
     Calculate airfoil translational and rotational parameters.
-    All input parameters are nondimensional.
+    All input parameters are nondimensional; they can be scalars or arrays
+    (e.g. one value per wing and/or per time), which are broadcast together.
 
     Parameters
     ----------
@@ -39,37 +41,70 @@ def wing_m(mpath, t, rt, tau, e, gMax, p, rtOff, phiT, phiB):
     dth: float
         Derivative of theta with respect to time (dtheta) / dt)
     """
-    if mpath == 0:
-        # Rolling motion
-        sump = phiT - phiB
-        phi = 0.5 * sump * (np.cos(np.pi * (t * rt + tau)) + e)
-        dph = -0.5 * sump * np.pi * rt * np.sin(np.pi * (t * rt + tau))   
+    mpath = np.asarray(mpath)
+    if np.any((mpath < 0) | (mpath > 4)):
+        raise ValueError("invalid mpath value")
+
+    sump = phiT - phiB
+
+    # mpath = 0: no tail
+    # Rolling motion
+    phi = 0.5 * sump * (np.cos(np.pi * (t * rt + tau)) + e)
+    dph = -0.5 * sump * np.pi * rt * np.sin(np.pi * (t * rt + tau))
+
+    # Rotational motion
+    gam = table_g(t, rt, tau, p, rtOff)
+    theta = gMax * gam
+    dgam = d_table_g(t, rt, tau, p, rtOff)
+    dth = gMax * dgam
+
+    # mpath = 1 - 4: one (nhp = 4) or two (nhp = 8) periods of flapping
+    # followed by as long a tail with the wing at rest; starting at the
+    # top with a down stroke (td = 1) or at the bottom with an up stroke (td = 2)
+    for m, td, nhp in ((1, 1, 4), (2, 2, 4), (3, 1, 8), (4, 2, 8)):
+        if np.any(mpath == m):
+            sign = 1.0 if td == 1 else -1.0
+            cos, dcos = cos_tail(t, rt, tau, nhp)
+            gam, dgam = table_tail(t, rt, tau, p, rtOff, nhp)
+            phi = np.where(mpath == m, 0.5 * sump * (sign * cos + e), phi)
+            dph = np.where(mpath == m, 0.5 * sump * sign * dcos, dph)
+            theta = np.where(mpath == m, gMax * sign * gam, theta)
+            dth = np.where(mpath == m, gMax * sign * dgam, dth)
 
-        # Rotational motion
-        gam = table_g(t, rt, tau, p, rtOff)
-        theta = gMax * gam
-        dgam = d_table_g(t, rt, tau, p, rtOff)
-        dth = gMax * dgam
+    return phi, theta, dph, dth
 
-    elif mpath == 1:
-        pass
+def kinematics_table(times, mpath, rt, tau, e, gMax, p, rtOff, phiT, phiB):
+    """
+    `wing_m()` for all wings at all times; the tables are cached, so runs
+    that share the time steps and motion parameters reuse them
 
-    elif mpath == 2:
-        pass
+    Parameters
+    ----------
+    times: ndarray[it]
+        Times
+    mpath, rt, tau, e, gMax, p, rtOff, phiT, phiB: ndarray[iwing]
+        Motion parameters of each wing, as in `wing_m()`
 
-    elif mpath == 3:
-        pass
+    Returns
+    -------
+    phi, theta, dph, dth: ndarray[iwing, it]
+        As in `wing_m()` (read-only)
+    """
+    return _kinematics_table(tuple(np.asarray(times, dtype=float)),
+                             *(tuple(np.asarray(x).tolist()) for x in
+                               (mpath, rt, tau, e, gMax, p, rtOff, phiT, phiB)))
 
-    elif mpath == 4:
-        pass
+@lru_cache(maxsize=16)
+def _kinematics_table(times, *params):
+    t = np.array(times)[np.newaxis, :]
+    params = [np.array(x)[:, np.newaxis] for x in params]
 
-    elif mpath == 5:
-        pass
+    tables = [np.array(np.broadcast_to(x, (params[0].shape[0], t.shape[1])))
+              for x in wing_m(params[0], t, *params[1:])]
+    for x in tables:
+        x.flags.writeable = False
 
-    else:
-        raise ValueError("invalid mpath value")
-    
-    return phi, theta, dph, dth
+    return tuple(tables)
 
 
 # Helper functions
@@ -80,7 +115,7 @@ def table_g(t, rt, tau, p, rtOff):
         f2 = 2.0 / (1.0 + np.exp(-2.0 * p * (t * rt + tau - (2.0 + rtOff))))
         f3 = 2.0 / (1.0 + np.exp(-2.0 * p * (t * rt + tau - (3.0 + rtOff))))
         f4 = 2.0 / (1.0 + np.exp(-2.0 * p * (t * rt + tau - (4.0 + rtOff))))
-        
+
         return 1.0 - f0 + f1 - f2 + f3 - f4
 
     tB = t % (2.0 / rt)
@@ -88,11 +123,11 @@ def table_g(t, rt, tau, p, rtOff):
 
 def d_table_g(t, rt, tau, p, rtOff):
     def d_table_b(t, rt, tau, p, rtOff):
-        e0 = np.exp(-2.0 * p * (t * rt + tau - (0.0 + rtOff)))    
-        e1 = np.exp(-2.0 * p * (t * rt + tau - (1.0 + rtOff)))    
+        e0 = np.exp(-2.0 * p * (t * rt + tau - (0.0 + rtOff)))
+        e1 = np.exp(-2.0 * p * (t * rt + tau - (1.0 + rtOff)))
         e2 = np.exp(-2.0 * p * (t * rt + tau - (2.0 + rtOff)))
-        e3 = np.exp(-2.0 * p * (t * rt + tau - (3.0 + rtOff)))   
-        e4 = np.exp(-2.0 * p * (t * rt + tau - (4.0 + rtOff))) 
+        e3 = np.exp(-2.0 * p * (t * rt + tau - (3.0 + rtOff)))
+        e4 = np.exp(-2.0 * p * (t * rt + tau - (4.0 + rtOff)))
 
         f0 = 4.0 * p * rt * e0 / (1.0+e0)**2
         f1 = 4.0 * p * rt * e1 / (1.0+e1)**2
@@ -104,3 +139,37 @@ def d_table_g(t, rt, tau, p, rtOff):
 
     tB = t % (2.0 / rt)
     return d_table_b(tB, rt, tau, p, rtOff)
+
+def cos_tail(t, rt, tau, nhp):
+    """
+    Flapping of the top-down tail paths: cos for nhp / 4 periods, then at
+    rest at the top for as long; returns the value and its time derivative
+    """
+    tB = t % (nhp / rt)
+    flap = tB * rt <= 0.5 * nhp
+
+    y = np.where(flap, np.cos(np.pi * (tB * rt + tau)), 1.0)
+    dy = np.where(flap, -np.pi * rt * np.sin(np.pi * (tB * rt + tau)), 0.0)
+
+    return y, dy
+
+def table_tail(t, rt, tau, p, rtOff, nhp):
+    """
+    Rotation of the top-down tail paths (smoothed steps between -1 and 1
+    while flapping, 0 in the tail); returns the value and its time derivative
+    """
+    def step(k, c):
+        # c times a smoothed unit step at k, and its derivative
+        ek = np.exp(-2.0 * p * (tB * rt + tau - (k + rtOff)))
+        return c / (1.0 + ek), 2.0 * c * p * rt * ek / (1.0 + ek)**2
+
+    tB = t % (nhp / rt)
+    m = nhp // 2
+
+    # Rotation at the start of the strokes k = 0 .. m - 1, back to 0 at k = m,
+    # and the start of the next cycle at k = nhp
+    steps = [step(0, -1.0)]
+    steps += [step(k, 2.0 * (-1.0)**(k + 1)) for k in range(1, m)]
+    steps += [step(m, (-1.0)**(m + 1)), step(nhp, -1.0)]
+
+    return sum(f for f, _ in steps), sum(df for _, df in steps)
@@ -12,6 +12,9 @@ with open('tests/test_config.toml', mode='rb') as file:
 
 g.solver = config['general']['solver']
 g.save_data = config['general']['save_data']
+g.stream_data = config['general']['stream_data']
+g.force_limit = config['general']['force_limit']
+g.precision = config['general']['precision']
 
 
 # Plotting
@@ -29,6 +32,12 @@ g.plot_enabled = config['plotting']['plot_enabled']
 
 g.dt = config['time']['dt']
 g.nstep = config['time']['nstep']
+g.scheme = config['time']['scheme']
+g.adaptive = config['time']['adaptive']
+g.tol = config['time']['tol']
+g.dtheta_max = config['time']['dtheta_max']
+g.dt_min = config['time']['dt_min']
+g.dt_max = config['time']['dt_max']
 
 
 # Body geometry
@@ -51,6 +60,8 @@ g.hfactor_f = config['wing_geometry']['hfactor_f']
 g.wfactor_f = config['wing_geometry']['wfactor_f']
 g.hfactor_r = config['wing_geometry']['hfactor_r']
 g.wfactor_r = config['wing_geometry']['wfactor_r']
+g.chord_grading = config['wing_geometry']['chord_grading']
+g.span_grading = config['wing_geometry']['span_grading']
 
 g.lt_f = config['wing_geometry']['lt_f']
 g.lr_f = config['wing_geometry']['lr_f']
@@ -89,3 +100,13 @@ g.U_ = np.array(config['fluid']['U_'])
 # ---------------
 
 g.RCUT = config['tolerance']['RCUT']
+g.core = config['tolerance']['core']
+g.core_radius = config['tolerance']['core_radius']
+
+
+# Cache
+# -----
+
+g.cache_enabled = config['cache']['enabled']
+g.cache_folder = config['cache']['folder']
+g.cache_max_size = config['cache']['max_size']
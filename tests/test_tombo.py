@@ -53,6 +53,59 @@ def test_symmetric_5_sided_mesh(matlab_wing_data):
     npt.assert_allclose(c_r, matlab_wing_data['c_r'])
     npt.assert_allclose(h_r, matlab_wing_data['h_r'])
 
+def test_symmetric_5_sided_mesh_fine():
+    from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh
+
+    # ~80000 elements; they tile the 5-sided planform exactly
+    Xb, nXb, Nb, Xc, nXc, Nc, l_, c_, h = \
+        symmetric_5_sided_mesh('f', 2.0, 2.0, 30.0, 0.005, 1.0)
+    assert nXb + nXc == 79201
+
+    def area(X):
+        x, y = X[0, :4], X[1, :4]
+        return 0.5 * np.sum(np.abs(np.sum(x * np.roll(y, -1, axis=0)
+                                          - np.roll(x, -1, axis=0) * y, axis=0)))
+
+    bang = np.radians(30.0)
+    npt.assert_allclose(area(Xb) + area(Xc), c_ * (np.cos(bang) + 2.0))
+    npt.assert_allclose(Nb, np.array([[0.0], [0.0], [1.0]]) * np.ones(nXb))
+    npt.assert_allclose(Nc, np.array([[0.0], [0.0], [1.0]]) * np.ones(nXc))
+
+def test_symmetric_5_sided_mesh_graded(monkeypatch):
+    from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh, GradedNodes
+    from tombo.wing_total import wing_total
+    from tombo.node_table import node_table
+
+    f = GradedNodes(5, 4.0, symmetric=True)
+    npt.assert_allclose(np.diff(f) / np.diff(f)[0], [1.0, 2.0, 4.0, 2.0, 1.0])
+    f = GradedNodes(3, 4.0, symmetric=False)
+    npt.assert_allclose(np.diff(f) / np.diff(f)[-1], [4.0, 2.0, 1.0])
+    npt.assert_array_equal(GradedNodes(4, 1.0, symmetric=True), np.arange(5) / 4)
+
+    def mesh():
+        Xb, nXb, Nb, Xc, nXc, Nc, *_ = \
+            symmetric_5_sided_mesh('f', 2.0, 2.0, 30.0, 0.05, 1.0)
+        xt, nxt = wing_total(Xb, nXb, Nb, Xc, nXc, Nc)[2:4]
+        return xt, nxt
+
+    xt, nxt = mesh()
+    monkeypatch.setattr(g, 'chord_grading', 4.0)
+    monkeypatch.setattr(g, 'span_grading', 3.0)
+    xt_g, nxt_g = mesh()
+
+    # Same elements, rearranged; the border and center elements still
+    # share their corners, and the graded mesh covers the same planform
+    assert nxt_g == nxt
+    assert len(node_table(xt_g, nxt_g)[1]) == len(node_table(xt, nxt)[1])
+
+    def area(X):
+        x, y = X[0], X[1]
+        return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=0)
+                                   - np.roll(x, -1, axis=0) * y, axis=0))
+
+    npt.assert_allclose(np.sum(area(xt_g)), np.sum(area(xt)))
+    assert np.min(area(xt_g)) < 0.5 * np.min(area(xt))
+
 def test_nd_data(matlab_wing_data, matlab_nd_data_data):
     from tombo.nd_data import nd_data
 
@@ -134,6 +187,7 @@ def test_wing_total(matlab_nd_data_data, matlab_wing_total_data):
 
 def test_lr_set_matrix(matlab_wing_total_data, matlab_loop_data):
     from tombo.lr_set_matrix import lr_set_matrix
+    from tombo.element_segments import element_segments
 
     xt_f = matlab_wing_total_data['xt_f']
     nxt_f = matlab_wing_total_data['nxt_f']
@@ -145,8 +199,8 @@ def test_lr_set_matrix(matlab_wing_total_data, matlab_loop_data):
     xC_r = matlab_wing_total_data['xC_r']
     nC_r = matlab_wing_total_data['nC_r']
 
-    MVNs_f = lr_set_matrix(xt_f, nxt_f, xC_f, nC_f, g.RCUT)
-    MVNs_r = lr_set_matrix(xt_r, nxt_r, xC_r, nC_r, g.RCUT)
+    MVNs_f = lr_set_matrix(*element_segments(xt_f, nxt_f), nxt_f, xC_f, nC_f, g.RCUT)
+    MVNs_r = lr_set_matrix(*element_segments(xt_r, nxt_r), nxt_r, xC_r, nC_r, g.RCUT)
 
     npt.assert_allclose(MVNs_f, matlab_loop_data['MVNs_f'])
     npt.assert_allclose(MVNs_r, matlab_loop_data['MVNs_r'])
@@ -177,8 +231,44 @@ def test_wing_m(matlab_loop_data):
     npt.assert_allclose(dph, matlab_loop_data['dph'])
     npt.assert_allclose(dth, matlab_loop_data['dth'])
 
+
+def test_kinematics_table():
+    from tombo.wing_m import wing_m, kinematics_table
+
+    times = 0.1 * np.arange(50)
+    mpath = np.array([0, 1, 2, 3, 4])
+    rt = np.array([1.0, 1.0, 0.5, 1.0, 2.0])
+    params = (rt, np.full(5, 0.3), np.full(5, 0.1), np.full(5, 0.7), np.full(5, 5.0),
+              np.full(5, 0.1), np.full(5, 1.2), np.full(5, -0.8))
+    phi, theta, dph, dth = kinematics_table(times, mpath, *params)
+
+    assert kinematics_table(times, mpath, *params)[0] is phi
+    for i in range(5):
+        for n in (0, 17, 49):
+            npt.assert_allclose([phi[i, n], theta[i, n], dph[i, n], dth[i, n]],
+                                wing_m(mpath[i], times[n], *[x[i] for x in params]))
+
+    # Derivatives of the tail paths
+    t = np.linspace(0.05, 15.95, 400)
+    h = 1e-6
+    for m in range(1, 5):
+        phi, theta, dph, dth = wing_m(m, t, 1.0, 0.0, 0.1, 0.7, 5.0, 0.1, 1.2, -0.8)
+        phi1, theta1, _, _ = wing_m(m, t + h, 1.0, 0.0, 0.1, 0.7, 5.0, 0.1, 1.2, -0.8)
+        phi0, theta0, _, _ = wing_m(m, t - h, 1.0, 0.0, 0.1, 0.7, 5.0, 0.1, 1.2, -0.8)
+        npt.assert_allclose(dph, (phi1 - phi0) / (2 * h), atol=1e-6)
+        npt.assert_allclose(dth, (theta1 - theta0) / (2 * h), atol=1e-5)
+
+    # At rest at the top (td = 1) or bottom (td = 2) in the tail, e.g. t = 3.5 for nhp = 4
+    npt.assert_allclose(wing_m(1, 3.5, 1.0, 0.0, 0.0, 0.7, 5.0, 0.0, 1.2, -0.8)[0], 1.0)
+    npt.assert_allclose(wing_m(2, 3.5, 1.0, 0.0, 0.0, 0.7, 5.0, 0.0, 1.2, -0.8)[0], -1.0)
+    npt.assert_allclose(wing_m(3, 6.0, 1.0, 0.0, 0.0, 0.7, 5.0, 0.0, 1.2, -0.8)[1], 0.0, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        wing_m(5, 0.0, 1.0, 0.0, 0.0, 0.7, 5.0, 0.0, 1.2, -0.8)
+
 def test_lr_mass_L2GT(matlab_loop_data):
-    from tombo.lr_mass_L2GT import lr_mass_L2GT
+    from tombo.lr_mass_L2GT import lr_mass_L2GT, wings_nodes_L2GT
+    from tombo.node_table import node_table, to_nodes, to_corners
 
     nxc_f = matlab_loop_data['nxc_f']
     nxc_r = matlab_loop_data['nxc_r']
@@ -234,8 +324,30 @@ def test_lr_mass_L2GT(matlab_loop_data):
     npt.assert_allclose(XC_f, matlab_loop_data['XC_f'])
     npt.assert_allclose(NC_f, matlab_loop_data['NC_f'])
 
+    # All wings in a single pass, on the indexed mesh: transform the unique
+    # nodes and gather the corners; lr_mass_L2GT() above is the reference
+    conn_f, first_f = node_table(xt_f, nxt_f)
+    conn_r, first_r = node_table(xt_r, nxt_r)
+    xn_f = to_nodes(xt_f, first_f)
+    xn_r = to_nodes(xt_r, first_r)
+    assert xn_f.shape[1] < 4 * nxt_f
+    Xn_f = np.empty((3, xn_f.shape[1], 2))
+    Xn_r = np.empty((3, xn_r.shape[1], 2))
+    buffers_f = [np.empty_like(XC_f), np.empty_like(NC_f)]
+    buffers_r = [np.empty_like(XC_r), np.empty_like(NC_r)]
+    wings_nodes_L2GT(beta, delta, phi, theta, a, U, t, np.array([b_f, b_r]),
+                     xn_f, xC_f, nC_f, Xn_f, *buffers_f,
+                     xn_r, xC_r, nC_r, Xn_r, *buffers_r)
+    for Xn, conn, nxb, Xt, Xb, XC, NC, buffers in (
+            (Xn_f, conn_f, nxb_f, Xt_f, Xb_f, XC_f, NC_f, buffers_f),
+            (Xn_r, conn_r, nxb_r, Xt_r, Xb_r, XC_r, NC_r, buffers_r)):
+        npt.assert_allclose(to_corners(Xn, conn), Xt[:, :4], atol=1e-12)
+        npt.assert_allclose(to_corners(Xn, conn[:, :nxb]), Xb[:, :4], atol=1e-12)
+        npt.assert_array_equal(buffers[0], XC)
+        npt.assert_array_equal(buffers[1], NC)
+
 def test_lrs_wing_NVs(matlab_loop_data):
-    from tombo.lrs_wing_NVs import lrs_wing_NVs
+    from tombo.lrs_wing_NVs import lrs_wing_NVs, wings_NVs
 
     nxt_f = matlab_loop_data['nxt_f']
     nxt_r = matlab_loop_data['nxt_r']
@@ -268,6 +380,14 @@ def test_lrs_wing_NVs(matlab_loop_data):
     npt.assert_allclose(Vnc_f, matlab_loop_data['Vnc_f'])
     npt.assert_allclose(Vnc_r, matlab_loop_data['Vnc_r'])
 
+    # All wings in one call
+    Vnc2_f = np.empty_like(Vnc_f)
+    Vnc2_r = np.empty_like(Vnc_r)
+    wings_NVs(xC_f, XC_f, NC_f, xC_r, XC_r, NC_r, t, theta, phi, dph, dth, a, beta, U,
+              Vnc2_f, Vnc2_r)
+    npt.assert_array_equal(Vnc2_f, Vnc_f)
+    npt.assert_array_equal(Vnc2_r, Vnc_r)
+
 def test_n_vel_T_by_W(matlab_loop_data):
     from tombo.n_vel_T_by_W import n_vel_T_by_W
 
@@ -312,6 +432,7 @@ def test_n_vel_T_by_W(matlab_loop_data):
 
 def test_cross_matrix(matlab_loop_data):
     from tombo.cross_matrix import cross_matrix
+    from tombo.element_segments import element_segments
 
     XC_f = matlab_loop_data['XC_f']
     NC_f = matlab_loop_data['NC_f']
@@ -322,19 +443,21 @@ def test_cross_matrix(matlab_loop_data):
     NC_r = matlab_loop_data['NC_r']
     Xt_r = matlab_loop_data['Xt_r']
     nxt_r = matlab_loop_data['nxt_r']
-
-    MVNs_12 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Xt_f[:, :, :, 1], nxt_f, g.RCUT)
-    MVNs_13 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Xt_r[:, :, :, 0], nxt_r, g.RCUT)
-    MVNs_14 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Xt_r[:, :, :, 1], nxt_r, g.RCUT)
-    MVNs_21 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Xt_f[:, :, :, 0], nxt_f, g.RCUT)
-    MVNs_23 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Xt_r[:, :, :, 0], nxt_r, g.RCUT)
-    MVNs_24 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Xt_r[:, :, :, 1], nxt_r, g.RCUT)
-    MVNs_31 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Xt_f[:, :, :, 0], nxt_f, g.RCUT)
-    MVNs_32 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Xt_f[:, :, :, 1], nxt_f, g.RCUT)
-    MVNs_34 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Xt_r[:, :, :, 1], nxt_r, g.RCUT)
-    MVNs_41 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Xt_f[:, :, :, 0], nxt_f, g.RCUT)
-    MVNs_42 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Xt_f[:, :, :, 1], nxt_f, g.RCUT)
-    MVNs_43 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Xt_r[:, :, :, 0], nxt_r, g.RCUT)
+    Et1_f, Et2_f = element_segments(Xt_f, nxt_f)
+    Et1_r, Et2_r = element_segments(Xt_r, nxt_r)
+
+    MVNs_12 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+    MVNs_13 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
+    MVNs_14 = cross_matrix(XC_f[:, :, 0], NC_f[:, :, 0], nxt_f, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+    MVNs_21 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+    MVNs_23 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
+    MVNs_24 = cross_matrix(XC_f[:, :, 1], NC_f[:, :, 1], nxt_f, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+    MVNs_31 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+    MVNs_32 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+    MVNs_34 = cross_matrix(XC_r[:, :, 0], NC_r[:, :, 0], nxt_r, Et1_r[1], Et2_r[1], nxt_r, g.RCUT)
+    MVNs_41 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Et1_f[0], Et2_f[0], nxt_f, g.RCUT)
+    MVNs_42 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Et1_f[1], Et2_f[1], nxt_f, g.RCUT)
+    MVNs_43 = cross_matrix(XC_r[:, :, 1], NC_r[:, :, 1], nxt_r, Et1_r[0], Et2_r[0], nxt_r, g.RCUT)
 
     npt.assert_allclose(MVNs_12, matlab_loop_data['MVNs_12'])
     npt.assert_allclose(MVNs_13, matlab_loop_data['MVNs_13'])
@@ -464,6 +587,7 @@ def test_s_impulse_WT(matlab_loop_data):
 
 def test_b_vel_B_by_T_matrix(matlab_loop_data):
     from tombo.b_vel_B_by_T_matrix import b_vel_B_by_T_matrix
+    from tombo.element_segments import element_segments
 
     nxb_f = matlab_loop_data['nxb_f']
     nxt_f = matlab_loop_data['nxt_f']
@@ -475,8 +599,8 @@ def test_b_vel_B_by_T_matrix(matlab_loop_data):
     Xb_r = matlab_loop_data['Xb_r']
     Xt_r = matlab_loop_data['Xt_r']
 
-    cVBT_f = b_vel_B_by_T_matrix(nxb_f, nxt_f, Xb_f, Xt_f, g.RCUT)
-    cVBT_r = b_vel_B_by_T_matrix(nxb_r, nxt_r, Xb_r, Xt_r, g.RCUT)
+    cVBT_f = b_vel_B_by_T_matrix(nxb_f, nxt_f, Xb_f, *element_segments(Xt_f, nxt_f), g.RCUT)
+    cVBT_r = b_vel_B_by_T_matrix(nxb_r, nxt_r, Xb_r, *element_segments(Xt_r, nxt_r), g.RCUT)
 
     npt.assert_allclose(cVBT_f, matlab_loop_data['cVBT_f'])
     npt.assert_allclose(cVBT_r, matlab_loop_data['cVBT_r'])
@@ -629,3 +753,396 @@ def test_vel_by(matlab_loop_data):
         npt.assert_allclose(VWW_f[:, :, :nxw_f], matlab_loop_data['VWW_f'])
         npt.assert_allclose(VWW_r[:, :, :nxw_r], matlab_loop_data['VWW_r'])
 
+
+def test_force_moment_step():
+    from tombo.force_moment import force_moment_step
+
+    rho_, v_, d_, dt = 1.0, 2.0, 0.5, 0.1
+    U = np.zeros(3)
+    slope = np.array([1.0, -2.0, 3.0])
+
+    # Impulses that grow linearly in time; spread over wings and vortex types
+    limp = slope[:, np.newaxis, np.newaxis] * dt * np.arange(1, 6)[:, np.newaxis] \
+        * np.ones((3, 5, g.nwing)) / 8
+    aimp = 2 * limp
+    times = dt * np.arange(1, 6)
+
+    for istep in range(1, 5):
+        time, force, moment = force_moment_step(rho_, v_, d_, istep, times, U,
+                                                limp, limp, aimp, aimp,
+                                                limp, limp, aimp, aimp)
+        f_ = rho_ * (v_ * d_)**2
+
+        npt.assert_allclose(time, dt * (istep + 1))
+        npt.assert_allclose(force, -f_ * slope)
+        npt.assert_allclose(moment, -2 * f_ * d_ * slope)
+
+def test_stream_force_moment(monkeypatch, tmp_path):
+    from tombo.force_moment import stream_force_moment, close_stream
+
+    monkeypatch.setattr(g, 'output_folder', str(tmp_path))
+    path = tmp_path / 'force_moment_stream.csv'
+
+    # Each line is readable as soon as it is streamed; a new run starts a new file
+    for _ in range(2):
+        for istep in range(3):
+            stream_force_moment(istep, 0.1 * istep, np.ones(3), -np.ones(3))
+            assert len(path.read_text().splitlines()) == istep + 2
+        close_stream()
+
+    data = np.loadtxt(path, delimiter=',', skiprows=1)
+    npt.assert_allclose(data[:, 0], np.arange(3))
+    npt.assert_allclose(data[:, 2:5], 1.0)
+
+def test_convect_wake():
+    from tombo.convect_wake import convect_wake
+
+    accel = np.array([1.0, -2.0, 0.5])[:, np.newaxis, np.newaxis, np.newaxis]
+    X0 = np.zeros((3, 4, 6, g.nwing))
+
+    # Velocity growing linearly in time: AB2 is exact, Euler is not
+    # Constant and variable time increments
+    for dts in ([0.1, 0.1, 0.1, 0.1, 0.1], [0.1, 0.05, 0.2, 0.1, 0.15]):
+        X_euler = X0.copy()
+        X_ab2 = X0.copy()
+        V_old = np.zeros_like(X0)
+        t = dts[0]
+        for dt_old, dt in zip(dts[:-1], dts[1:]):
+            V = accel * t * np.ones_like(X0)
+            X_euler = convect_wake(X_euler, V, V_old, X0.shape[2], dt, dt_old, 'euler')
+            X_ab2 = convect_wake(X_ab2, V, V_old, X0.shape[2], dt, dt_old, 'ab2')
+            V_old = V
+            t += dt
+
+        # Steps span t = dts[0] to t = sum(dts)
+        exact = 0.5 * accel * (t**2 - dts[0]**2) * np.ones_like(X0)
+        npt.assert_allclose(X_ab2, exact)
+        assert not np.allclose(X_euler, exact)
+
+def test_adaptive_dt(monkeypatch):
+    from tombo.adaptive_dt import adaptive_dt
+
+    monkeypatch.setattr(g, 'dt_min', 0.025)
+    monkeypatch.setattr(g, 'dt_max', 0.2)
+    monkeypatch.setattr(g, 'tol', 1e-2)
+    monkeypatch.setattr(g, 'dtheta_max', 0.3)
+
+    # Grows by at most a factor 2, up to dt_max
+    npt.assert_allclose(adaptive_dt(0.05, 0.0, 0.0, 10.0), 0.1)
+    npt.assert_allclose(adaptive_dt(0.15, 0.0, 0.0, 10.0), 0.2)
+    # Wake convection error and rotation limits
+    npt.assert_allclose(adaptive_dt(0.1, 0.5, 0.0, 10.0), 2.0 * 1e-2 / 0.5)
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 6.0, 10.0), 0.3 / 6.0)
+    npt.assert_allclose(adaptive_dt(0.1, 0.5, 6.0, 10.0), 0.04)
+    # Clamped to dt_min
+    npt.assert_allclose(adaptive_dt(0.1, 100.0, 0.0, 10.0), 0.025)
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 1e3, 10.0), 0.025)
+    # The last two steps end exactly on time, even below dt_min
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 0.0, 0.15), 0.15)
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 0.0, 0.3), 0.15)
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 0.0, 0.01), 0.01)
+    npt.assert_allclose(adaptive_dt(0.1, 0.0, 0.0, 0.4), 0.2)
+    # A remainder over dt by round-off is not split
+    npt.assert_allclose(adaptive_dt(0.05, 0.0, 0.0, 0.1 + 1e-15), 0.1 + 1e-15)
+
+def test_resample_impulse():
+    from tombo.force_moment import resample_impulse
+
+    # Cubic impulses on irregular times are resampled exactly
+    times = np.cumsum([0.1, 0.05, 0.2, 0.1, 0.15, 0.05, 0.1])
+    c = np.arange(1.0, 7.0).reshape(3, 1, 2)
+    cubic = lambda t: c * (1.0 - 2.0 * t + t**3)[np.newaxis, :, np.newaxis]
+    times_new = 0.1 * np.arange(1, 8)
+
+    npt.assert_allclose(resample_impulse(times, cubic(times), times_new), cubic(times_new))
+    npt.assert_allclose(resample_impulse(times, cubic(times), times), cubic(times))
+
+def test_simulate_adaptive(monkeypatch, capsys):
+    from tombo.simulate import simulate
+
+    monkeypatch.setattr(g, 'cache_enabled', False)
+    _, force, moment = simulate()
+
+    # Steps fixed at dt: the same time march as uniform steps
+    monkeypatch.setattr(g, 'adaptive', True)
+    monkeypatch.setattr(g, 'dt_min', g.dt)
+    monkeypatch.setattr(g, 'dt_max', g.dt)
+    _, force_a, moment_a = simulate()
+    npt.assert_allclose(force_a, force, rtol=1e-8, atol=1e-12 * np.abs(force).max())
+    npt.assert_allclose(moment_a, moment, rtol=1e-8, atol=1e-12 * np.abs(moment).max())
+
+    # More steps than nstep: the step-sized arrays are grown during the march
+    monkeypatch.setattr(g, 'dt_min', 0.5 * g.dt)
+    monkeypatch.setattr(g, 'dt_max', 0.5 * g.dt)
+    capsys.readouterr()
+    _, force_a, moment_a = simulate()
+    assert f"{2 * g.nstep - 1} steps" in capsys.readouterr().out
+    assert force_a.shape == force.shape and np.all(np.isfinite(force_a))
+    assert moment_a.shape == moment.shape and np.all(np.isfinite(moment_a))
+
+def test_node_table():
+    from tombo.node_table import node_table, wake_table, to_nodes, to_corners
+
+    # Two unit squares sharing an edge; shared corners off by round-off
+    X = np.zeros((3, 4, 2))
+    X[:2, :, 0] = [[0, 1, 1, 0], [0, 0, 1, 1]]
+    X[:2, :, 1] = [[1, 2, 2, 1], [0, 0, 1, 1]]
+    X[0, 0, 1] += 1e-14
+
+    conn, first = node_table(X, 2)
+    assert len(first) == 6
+    assert conn[1, 0] == conn[0, 1] and conn[2, 0] == conn[3, 1]
+    npt.assert_allclose(to_corners(to_nodes(X, first), conn), X, atol=1e-13)
+
+    # Values with a trailing wing axis
+    V = np.stack((X, 2 * X), axis=-1)
+    npt.assert_allclose(to_corners(to_nodes(V, first), conn), V, atol=1e-13)
+
+    # Each wake row uses its own copy of the nodes
+    conn_w = wake_table(conn, len(first), 3)
+    npt.assert_array_equal(conn_w[:, 4:6], conn + 2 * len(first))
+
+    # Shared corners on either side of a cell boundary of the merging grid
+    # (multiples of tol = 2e-9 here) are merged too
+    X[0, 0, 1] = 1.0 + 1e-14
+    X[0, 1, 0] = 1.0 - 1e-14
+    conn, first = node_table(X, 2)
+    assert len(first) == 6 and conn[1, 0] == conn[0, 1]
+
+def test_node_table_mesh():
+    from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh
+    from tombo.wing_total import wing_total
+    from tombo.node_table import node_table, sub_table
+
+    xb, nxb, nb, xc, nxc, nc, *_ = \
+        symmetric_5_sided_mesh('f', g.lt_f, g.lr_f, g.bang_f, g.hfactor_f / 2, g.wfactor_f)
+    _, _, xt, nxt, _, _ = wing_total(xb, nxb, nb, xc, nxc, nc)
+    conn, first = node_table(xt, nxt)
+
+    # Same nodes as merging each corner with the first one within tol
+    P = xt[:, :4, :nxt].reshape(3, -1)
+    d = np.max(np.abs(P[:, :, np.newaxis] - P[:, np.newaxis, :]), axis=0)
+    near = d <= 1e-9 * max(np.max(np.abs(P)), 1.0)
+    npt.assert_array_equal(first, np.flatnonzero(np.argmax(near, axis=1) == np.arange(P.shape[1])))
+    npt.assert_array_equal(first[conn.ravel()], np.argmax(near, axis=1))
+
+    # The table of the border elements (the first nxb) from the total one
+    for x, y in zip(sub_table(conn, nxb), node_table(xt, nxb)):
+        npt.assert_array_equal(x, y)
+
+def test_source_segments():
+    from tombo.node_table import node_table, to_nodes
+    from tombo.source_segments import segment_table, source_segments
+    from tombo.cross_vel_B_by_T import cross_vel_B_by_T, cross_vel_B_by_segments
+
+    # 2 x 2 panels of a unit square: 16 edges, 12 of them unique
+    X = np.zeros((3, 4, 4))
+    for i, (x0, y0) in enumerate([(0, 0), (1, 0), (0, 1), (1, 1)]):
+        X[0, :, i] = 0.5 * np.array([x0, x0 + 1, x0 + 1, x0])
+        X[1, :, i] = 0.5 * np.array([y0, y0, y0 + 1, y0 + 1])
+    GAM = np.array([1.0, -2.0, 0.5, 3.0])
+
+    conn, first = node_table(X, 4)
+    edges, seg, sign = segment_table(conn)
+    assert edges.shape[1] == 12
+    S1, S2, GAMS = source_segments(to_nodes(X, first), edges, seg, sign, GAM, 4, 12)
+
+    # Same velocity as summing the four edges of every panel
+    rng = np.random.default_rng(0)
+    Xb = rng.uniform(-1, 2, (3, 4, 5))
+    npt.assert_allclose(cross_vel_B_by_segments(Xb, 5, S1, S2, GAMS, g.RCUT, 0.01, 4 * np.pi, 0.0),
+                        cross_vel_B_by_T(Xb, 5, X, GAM, 4, g.RCUT, 0.01), atol=1e-12)
+
+def test_vel_batch():
+    from tombo.mVORTEX import mVORTEX
+    from tombo.vel_batch import vel_batch_groups
+
+    rng = np.random.default_rng(1)
+    S1 = rng.uniform(-1, 1, (3, 8))
+    S2 = rng.uniform(-1, 1, (3, 8))
+    GAMS = rng.standard_normal(8)
+    N1 = rng.uniform(-1, 1, (3, 3))
+    N2 = rng.uniform(-1, 1, (3, 4))
+
+    # Group 1 sees all sources, group 2 only the second group / per-node ranges
+    (Va1, Vb1), (Va2, Vb2) = vel_batch_groups([(N1, 0, 8), (N2, 5, np.array([8, 8, 5, 5]))],
+                                              S1, S2, GAMS, 5, g.RCUT, 0.01, 4 * np.pi, 0.0)
+
+    def direct(x, a, b):
+        return np.array(mVORTEX(x[0], x[1], x[2], S1[0, a:b], S1[1, a:b], S1[2, a:b],
+                                S2[0, a:b], S2[1, a:b], S2[2, a:b], GAMS[a:b], g.RCUT, 0.01))
+
+    for k in range(3):
+        npt.assert_allclose(Va1[:, k], direct(N1[:, k], 0, 5))
+        npt.assert_allclose(Vb1[:, k], direct(N1[:, k], 5, 8))
+    npt.assert_allclose(Va2, 0)
+    npt.assert_allclose(Vb2[:, :2], np.stack([direct(N2[:, k], 5, 8) for k in range(2)], axis=1))
+    npt.assert_allclose(Vb2[:, 2:], 0)
+
+def test_vortex_segments():
+    from tombo.mVORTEX import mVORTEX
+    from tombo.vortex_segments import vortex_segments
+
+    rng = np.random.default_rng(2)
+    S1 = rng.uniform(-1, 1, (3, 50))
+    S2 = S1 + rng.uniform(-0.1, 0.1, (3, 50))
+    GAMS = rng.standard_normal(50)
+    x, y, z = 2.0, 0.5, -0.3
+
+    V = np.array(mVORTEX(x, y, z, S1[0], S1[1], S1[2], S2[0], S2[1], S2[2], GAMS, g.RCUT, 0.01))
+    V64 = np.array(vortex_segments(x, y, z, S1, S2, GAMS, 0, 50, g.RCUT, 0.01, 4 * np.pi, 0.0))
+    f = np.float32
+    V32 = np.array(vortex_segments(f(x), f(y), f(z), S1.astype(f), S2.astype(f),
+                                   GAMS.astype(f), 0, 50, f(g.RCUT), f(0.01), f(4 * np.pi), f(0.0)))
+
+    npt.assert_allclose(V64, V, rtol=1e-12)
+    # float32 contributions: round-off level deviation only
+    npt.assert_allclose(V32, V, rtol=1e-4, atol=1e-6 * np.abs(V).max())
+
+def test_element_segments():
+    from tombo.element_segments import element_segments
+
+    X = np.random.default_rng(3).uniform(size=(3, 4, 5, 2))
+    E1, E2 = element_segments(X, 5)
+
+    assert E1.shape == (2, 3, 20) and E1.flags.c_contiguous
+    npt.assert_array_equal(E1[1, :, 4 * 2 + 3], X[:, 3, 2, 1])
+    npt.assert_array_equal(E2[1, :, 4 * 2 + 3], X[:, 0, 2, 1])
+    # Edge k = 4 * i + n starts at corner n of element i
+    npt.assert_array_equal(np.moveaxis(E1.reshape(2, 3, 5, 4), (1, 3, 2), (0, 1, 2)), X)
+
+def test_vortex_segments_smooth():
+    from tombo.vortex_segments import vortex_segments
+
+    rng = np.random.default_rng(4)
+    S1 = rng.uniform(-1, 1, (3, 50))
+    S2 = S1 + rng.uniform(-0.1, 0.1, (3, 50))
+    GAMS = rng.standard_normal(50)
+    LCUT = 0.01
+
+    def vel(p, DELTA2):
+        return np.array(vortex_segments(*p, S1, S2, GAMS, 0, 50, g.RCUT, LCUT, 4 * np.pi, DELTA2))
+
+    # Far from the segments, the smoothed core agrees with the cut-off model
+    # to O((LCUT / distance)^2)
+    for p in ([3.0, 0.2, -0.5], [0.1, -4.0, 1.0]):
+        npt.assert_allclose(vel(p, 0.5 * LCUT**2), vel(p, 0.0), rtol=1e-4)
+
+    # On a segment: no contribution from it, and a bounded velocity close to it
+    p = 0.5 * (S1[:, 0] + S2[:, 0])
+    seg = np.array(vortex_segments(*p, S1, S2, GAMS, 0, 1, g.RCUT, LCUT, 4 * np.pi, 0.5 * LCUT**2))
+    npt.assert_allclose(seg, 0, atol=1e-12)
+    h = np.cross(S2[:, 0] - S1[:, 0], [0.0, 0.0, 1.0])
+    h *= 1e-6 / np.linalg.norm(h)
+    near = np.array(vortex_segments(*(p + h), S1, S2, GAMS, 0, 1, g.RCUT, LCUT, 4 * np.pi,
+                                    0.5 * LCUT**2))
+    assert np.linalg.norm(near) < abs(GAMS[0]) / (2 * np.pi * LCUT)
+
+def test_geometry_cache(tmp_path, monkeypatch):
+    from tombo.geometry_cache import cached_mesh, cached_self_matrix
+    from tombo.symmetric_5_sided_mesh import symmetric_5_sided_mesh
+    from tombo.lr_set_matrix import lr_set_matrix
+    from tombo.element_segments import element_segments
+    from tombo.wing_total import wing_total
+
+    monkeypatch.setattr(g, 'cache_enabled', True)
+    monkeypatch.setattr(g, 'cache_folder', str(tmp_path))
+
+    args = ('f', g.lt_f, g.lr_f, g.bang_f, g.hfactor_f, g.wfactor_f)
+    mesh = symmetric_5_sided_mesh(*args)
+    # Miss (computed and stored), then hit (loaded)
+    for _ in range(2):
+        cached = cached_mesh(*args)
+        for x, y in zip(cached, mesh):
+            npt.assert_array_equal(x, y)
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+
+    xb, nxb, nb, xc, nxc, nc = mesh[:6]
+    xc, xb, xt, nxt, xC, nC = wing_total(xb, nxb, nb, xc, nxc, nc)
+    MVNs = lr_set_matrix(*element_segments(xt, nxt), nxt, xC, nC, g.RCUT)
+    for _ in range(2):
+        npt.assert_array_equal(cached_self_matrix(xt, nxt, xC, nC, g.RCUT), MVNs)
+    assert len(list(tmp_path.glob('*.npz'))) == 2
+
+    # A scaled wing is a new entry; beyond the size limit the least
+    # recently used entries are evicted
+    monkeypatch.setattr(g, 'cache_max_size', 1.5 * MVNs.nbytes / 1024**2)
+    cached_self_matrix(2.0 * xt, nxt, 2.0 * xC, nC, g.RCUT)
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+
+def test_identical_wings(monkeypatch):
+    import tombo.simulate
+    from tombo.geometry_cache import identical_wings
+
+    assert not identical_wings()
+    for name in ('lt', 'lr', 'bang', 'hfactor', 'wfactor'):
+        monkeypatch.setattr(g, f'{name}_r', getattr(g, f'{name}_f'))
+    monkeypatch.setattr(g, 'cache_enabled', False)
+    assert identical_wings()
+
+    # Sharing the front wing geometry with the rear wings changes nothing
+    shared = tombo.simulate.simulate()
+    monkeypatch.setattr(tombo.simulate, 'identical_wings', lambda: False)
+    separate = tombo.simulate.simulate()
+    for x, y in zip(shared, separate):
+        npt.assert_array_equal(x, y)
+
+def test_richardson():
+    from tombo.converge import richardson, relative_error
+
+    # f(h) = f0 + C h^2 on meshes refined by 2 is extrapolated exactly
+    f0 = np.array([1.0, -2.0, 0.5])
+    h = 0.1 / 2.0**np.arange(4)
+    f = f0 + np.array([0.3, 0.1, -0.2]) * h[:, np.newaxis]**2
+    f_inf, p = richardson(f, 2.0)
+    npt.assert_allclose(f_inf, f0)
+    npt.assert_allclose(p, 2.0)
+
+    err = relative_error(f, f_inf)
+    assert np.all(np.diff(err) < 0)
+
+    # First order is assumed with two meshes
+    _, p = richardson(f[:2], 2.0)
+    assert p == 1.0
+
+def test_timers(tmp_path):
+    import json
+    from tombo.timers import start_timers, stop_timers, set_step, timer
+    from tombo.timers import summary, export_json
+    from tombo.simulate import simulate
+
+    # Disabled: nothing is recorded
+    with timer('a'):
+        pass
+
+    start_timers()
+    simulate()
+    times = stop_timers()
+    assert stop_timers() is None
+
+    profile = summary(times)
+    assert profile['nstep'] == g.nstep
+    for stage in ('mesh', 'geometry', 'wake_on_wing', 'cross_matrix', 'assembly',
+                  'solution', 'impulse', 'border_velocity', 'wake_velocity', 'force'):
+        assert stage in profile['stages']
+    assert profile['stages']['mesh']['setup'] == profile['stages']['mesh']['total']
+    assert len(profile['stages']['solution']['steps']) == g.nstep
+    # The first step (with compilation) is not in the mean and max per step
+    solution = profile['stages']['solution']
+    assert solution['first_step'] == solution['steps'][0]
+    npt.assert_allclose(solution['mean_per_step'], np.mean(solution['steps'][1:]))
+    assert solution['max_per_step'] == max(solution['steps'][1:])
+    npt.assert_allclose(sum(s['fraction'] for s in profile['stages'].values()), 1.0)
+
+    # Times of a stage accumulate within a step
+    start_timers()
+    set_step(0)
+    for _ in range(2):
+        with timer('a'):
+            pass
+    times = stop_timers()
+    assert list(times) == ['a'] and list(times['a']) == [0]
+
+    export_json(profile, tmp_path / 'profile.json')
+    with open(tmp_path / 'profile.json') as file:
+        assert json.load(file)['nstep'] == g.nstep